@@ -10,41 +10,54 @@ from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QLabel, QPushButton, QLineEdit, QFileDialog, QComboBox, QCheckBox,
     QProgressBar, QTextEdit, QGroupBox, QSpinBox, QTableWidget, QTableWidgetItem,
-    QHeaderView, QMessageBox, QDialog, QMenuBar, QMenu, QScrollArea, QSizePolicy
+    QHeaderView, QMessageBox, QDialog, QMenuBar, QMenu, QScrollArea, QSizePolicy,
+    QStyledItemDelegate, QStyleOptionButton, QStyle, QAbstractItemView
 )
-from PyQt5.QtCore import QThread, pyqtSignal, QObject, QTimer, Qt
-from PyQt5.QtGui import QPixmap, QImage, QPainter, QWheelEvent
+from PyQt5.QtCore import QThread, pyqtSignal, QObject, QTimer, Qt, QEvent
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QWheelEvent, QTextCursor
 import sys
 import os
+import re
+import shutil
 import subprocess
+import time
 from pathlib import Path
 import psutil
 import json
+from contextlib import contextmanager
 
 # 从 transcode_core.py 导入转码函数
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from transcode_core import (
-    which_ffmpeg, run, iter_video_files, 
-    VIDEO_EXTS
+    which_ffmpeg, run, iter_video_files, probe_duration, probe_durations,
+    VIDEO_EXTS, SUBPROCESS_CREATIONFLAGS, SUBPROCESS_STARTUPINFO, PARTIAL_SUFFIX
 )
 import threading
+import queue
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Callable, Optional, Tuple, List
 from datetime import datetime
+from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import namedtuple
 import io
 import atexit
+import ctypes
 
-# Windows下隐藏subprocess窗口的标志
-if sys.platform == "win32":
-    # 使用subprocess模块的CREATE_NO_WINDOW常量（Python 3.7+）
-    try:
-        CREATE_NO_WINDOW = subprocess.CREATE_NO_WINDOW
-    except AttributeError:
-        # 如果subprocess没有该常量，使用数值
-        CREATE_NO_WINDOW = 0x08000000
-else:
-    CREATE_NO_WINDOW = 0
+# 可选依赖：NVML（nvidia-ml-py），用于在进程内查询NVIDIA显卡信息
+try:
+    import pynvml
+    pynvml.nvmlInit()
+    NVML_AVAILABLE = True
+except Exception:
+    pynvml = None
+    NVML_AVAILABLE = False
 
+# 可选依赖：orjson，更快的JSON解析/序列化（未安装时使用标准库 json）
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 def get_app_directory():
     """获取应用程序目录（支持打包后的exe）。
@@ -60,8 +73,39 @@ def get_app_directory():
         return Path(__file__).parent
 
 
+def read_json_file(path: Path):
+    """读取JSON文件（安装了 orjson 时使用 orjson 解析）。"""
+    data = path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def write_json_file(path: Path, data) -> None:
+    """将数据写入JSON文件（缩进2格，非ASCII字符原样保存）。
+    
+    先写入临时文件再替换，避免写入中断导致文件损坏。
+    """
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    tmp_file = path.with_name(path.name + '.tmp')
+    tmp_file.write_bytes(payload)
+    os.replace(tmp_file, path)
+
+
+# 上次成功使用的GPU编码器（按codec记录），以及尚未写入配置文件的记录
+_last_saved_gpu_encoders = {'hevc': None, 'h264': None}
+_pending_gpu_encoders = {}
+_gpu_encoder_lock = threading.Lock()
+
+
 def save_last_gpu_encoder_global(encoder, codec='hevc'):
-    """全局函数：保存上次成功使用的GPU编码器到配置文件。
+    """全局函数：记录上次成功使用的GPU编码器。
+    
+    只有值发生变化时才记录，实际写入配置文件延迟到程序退出时
+    （见 flush_last_gpu_encoders），避免每个文件转码成功后都读写一次配置文件。
     
     Args:
         encoder: GPU编码器名称
@@ -70,6 +114,21 @@ def save_last_gpu_encoder_global(encoder, codec='hevc'):
     if not encoder:
         return
     
+    with _gpu_encoder_lock:
+        if _last_saved_gpu_encoders.get(codec) == encoder:
+            return
+        _last_saved_gpu_encoders[codec] = encoder
+        _pending_gpu_encoders[codec] = encoder
+
+
+def flush_last_gpu_encoders():
+    """将记录的GPU编码器写入配置文件（程序退出时调用）。"""
+    with _gpu_encoder_lock:
+        pending = dict(_pending_gpu_encoders)
+        _pending_gpu_encoders.clear()
+    if not pending:
+        return
+    
     try:
         config_file = get_app_directory() / "sonyToPhoto_config.json"
         
@@ -77,32 +136,58 @@ def save_last_gpu_encoder_global(encoder, codec='hevc'):
         config = {}
         if config_file.exists():
             try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
+                config = read_json_file(config_file)
             except:
                 pass
         
         # 更新GPU编码器记录
-        config_key = f'last_gpu_encoder_{codec}'
-        config[config_key] = encoder
+        for codec, encoder in pending.items():
+            config[f'last_gpu_encoder_{codec}'] = encoder
         
-        # 保存配置
         config_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
+        write_json_file(config_file, config)
     except Exception as e:
-        # 静默处理错误，不影响转码流程
+        # 静默处理错误，不影响程序退出
         pass
 
 
+atexit.register(flush_last_gpu_encoders)
+
+
+# 日志文件写缓冲区大小
+LOG_BUFFER_SIZE = 64 * 1024
+
+
 class TimestampedFileLogger:
-    """带时间戳的文件日志记录器，重定向stdout到文件。"""
+    """带时间戳的文件日志记录器，重定向stdout到文件。
+    
+    各线程的 print 只把格式化好的行放入队列，由单独的写入线程统一写入文件，
+    避免多个转码线程同时写文件时互相阻塞或输出交错。
+    """
     
     _instance = None
     _log_file = None
     _original_stdout = None
     _exiting = False
     
+    # 待写入的日志行队列及写入线程
+    _queue = None
+    _writer_thread = None
+    _STOP = object()
+    
+    # 秒级时间戳缓存：同一秒内的写入复用同一个格式化字符串
+    _last_ts_sec = 0
+    _last_ts_str = ''
+    
+    @classmethod
+    def _timestamp(cls):
+        """返回当前时间的格式化字符串（每秒最多格式化一次）。"""
+        now = int(time.time())
+        if now != cls._last_ts_sec:
+            cls._last_ts_str = datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S')
+            cls._last_ts_sec = now
+        return cls._last_ts_str
+    
     def __init__(self, log_file_path: Path):
         """初始化日志记录器。
         
@@ -119,16 +204,25 @@ class TimestampedFileLogger:
         # 保存原始stdout
         TimestampedFileLogger._original_stdout = sys.stdout
         
-        # 以追加模式打开日志文件
-        TimestampedFileLogger._log_file = open(self.log_file_path, 'a', encoding='utf-8')
+        # 以追加模式打开日志文件（使用64KB写缓冲，减少写入系统调用）
+        raw_file = open(self.log_file_path, 'ab', buffering=0)
+        buffered_file = io.BufferedWriter(raw_file, buffer_size=LOG_BUFFER_SIZE)
+        TimestampedFileLogger._log_file = io.TextIOWrapper(buffered_file, encoding='utf-8')
         
         # 写入启动分隔符
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        timestamp = TimestampedFileLogger._timestamp()
         TimestampedFileLogger._log_file.write(f"\n{'='*60}\n")
         TimestampedFileLogger._log_file.write(f"[{timestamp}] 程序启动\n")
         TimestampedFileLogger._log_file.write(f"{'='*60}\n")
         TimestampedFileLogger._log_file.flush()
         
+        # 启动写入线程
+        TimestampedFileLogger._queue = queue.SimpleQueue()
+        TimestampedFileLogger._writer_thread = threading.Thread(
+            target=TimestampedFileLogger._drain_queue, daemon=True
+        )
+        TimestampedFileLogger._writer_thread.start()
+        
         # 重定向stdout到自定义对象
         sys.stdout = self
         
@@ -139,14 +233,40 @@ class TimestampedFileLogger:
         
         return self
     
+    @classmethod
+    def _drain_queue(cls):
+        """写入线程：从队列取出日志行写入文件，队列清空时刷新一次。"""
+        log_queue = cls._queue
+        while True:
+            line = log_queue.get()
+            while line is not cls._STOP:
+                cls._log_file.write(line)
+                if log_queue.empty():
+                    break
+                line = log_queue.get()
+            if line is cls._STOP:
+                break
+            cls._log_file.flush()
+    
+    @classmethod
+    def _stop_writer(cls):
+        """停止写入线程，确保队列中的日志全部写入文件。"""
+        if cls._writer_thread is None:
+            return
+        cls._queue.put(cls._STOP)
+        cls._writer_thread.join(timeout=5)
+        cls._writer_thread = None
+        cls._queue = None
+    
     def _cleanup_on_exit(self):
         """程序退出时的清理函数。"""
         if TimestampedFileLogger._exiting:
             return
         TimestampedFileLogger._exiting = True
+        TimestampedFileLogger._stop_writer()
         
         if TimestampedFileLogger._log_file:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = TimestampedFileLogger._timestamp()
             TimestampedFileLogger._log_file.write(f"[{timestamp}] 程序退出\n")
             TimestampedFileLogger._log_file.write(f"{'='*60}\n\n")
             TimestampedFileLogger._log_file.flush()
@@ -162,10 +282,11 @@ class TimestampedFileLogger:
         # 如果已经通过atexit处理，不再重复处理
         if TimestampedFileLogger._exiting:
             return
+        TimestampedFileLogger._stop_writer()
         
         # 写入关闭分隔符
         if TimestampedFileLogger._log_file:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = TimestampedFileLogger._timestamp()
             TimestampedFileLogger._log_file.write(f"[{timestamp}] 程序退出\n")
             TimestampedFileLogger._log_file.write(f"{'='*60}\n\n")
             TimestampedFileLogger._log_file.flush()
@@ -182,25 +303,198 @@ class TimestampedFileLogger:
     def write(self, message):
         """写入消息到日志文件（带时间戳）。"""
         if message and message.strip():  # 只处理非空消息
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = TimestampedFileLogger._timestamp()
             # 确保消息以换行符结尾
             if not message.endswith('\n'):
                 message = message + '\n'
             log_message = f"[{timestamp}] {message}"
-            if TimestampedFileLogger._log_file:
+            log_queue = TimestampedFileLogger._queue
+            if log_queue is not None:
+                log_queue.put(log_message)
+            elif TimestampedFileLogger._log_file:
                 TimestampedFileLogger._log_file.write(log_message)
-                TimestampedFileLogger._log_file.flush()  # 立即刷新到文件
     
     def flush(self):
-        """刷新缓冲区。"""
-        if TimestampedFileLogger._log_file:
-            TimestampedFileLogger._log_file.flush()
+        """刷新缓冲区（写入线程会在队列清空时自动刷新，这里无需操作）。"""
+        pass
+
+
+# DXGI 适配器厂商ID到GPU品牌的映射
+DXGI_VENDOR_MAP = {
+    0x10DE: 'NVIDIA',
+    0x1002: 'AMD',
+    0x1022: 'AMD',
+    0x8086: 'Intel',
+}
+
+# 专用显存大于此值视为独显
+DXGI_DEDICATED_MEMORY_THRESHOLD = 256 * 1024 * 1024
+
+
+class DXGI_ADAPTER_DESC1(ctypes.Structure):
+    """DXGI_ADAPTER_DESC1 结构体（dxgi.h）。"""
+    _fields_ = [
+        ('Description', ctypes.c_wchar * 128),
+        ('VendorId', ctypes.c_uint),
+        ('DeviceId', ctypes.c_uint),
+        ('SubSysId', ctypes.c_uint),
+        ('Revision', ctypes.c_uint),
+        ('DedicatedVideoMemory', ctypes.c_size_t),
+        ('DedicatedSystemMemory', ctypes.c_size_t),
+        ('SharedSystemMemory', ctypes.c_size_t),
+        ('AdapterLuidLowPart', ctypes.c_uint32),
+        ('AdapterLuidHighPart', ctypes.c_int32),
+        ('Flags', ctypes.c_uint),
+    ]
+
+
+def _enum_gpu_adapters_dxgi():
+    """通过 ctypes 调用 DXGI（IDXGIFactory1::EnumAdapters1）枚举显卡适配器。
+    在进程内完成，无需启动 PowerShell 子进程。
+    
+    Returns:
+        List[Tuple[int, str, int]]: [(厂商ID, 适配器名称, 专用显存字节数), ...]，
+        非Windows系统或DXGI不可用时返回 None
+    """
+    if sys.platform != "win32":
+        return None
+    
+    try:
+        dxgi = ctypes.windll.dxgi
+    except (AttributeError, OSError):
+        return None
+    
+    HRESULT = ctypes.c_long
+    DXGI_ADAPTER_FLAG_SOFTWARE = 2
+    
+    def com_method(obj, index, *argtypes):
+        # 从COM对象的虚函数表中取出第 index 个方法
+        vtbl = ctypes.cast(obj, ctypes.POINTER(ctypes.POINTER(ctypes.c_void_p))).contents
+        return ctypes.WINFUNCTYPE(HRESULT, ctypes.c_void_p, *argtypes)(vtbl[index])
+    
+    def release(obj):
+        vtbl = ctypes.cast(obj, ctypes.POINTER(ctypes.POINTER(ctypes.c_void_p))).contents
+        ctypes.WINFUNCTYPE(ctypes.c_ulong, ctypes.c_void_p)(vtbl[2])(obj)
+    
+    # IID_IDXGIFactory1 = {770aae78-f26f-4dba-a829-253c83d1b387}
+    iid_factory1 = (ctypes.c_byte * 16)(*bytes.fromhex('78ae0a776ff2ba4da829253c83d1b387'))
+    factory = ctypes.c_void_p()
+    if dxgi.CreateDXGIFactory1(ctypes.byref(iid_factory1), ctypes.byref(factory)) != 0:
+        return None
+    
+    adapters = []
+    try:
+        # IDXGIFactory1::EnumAdapters1 位于虚函数表第12位
+        enum_adapters1 = com_method(factory, 12, ctypes.c_uint, ctypes.POINTER(ctypes.c_void_p))
+        index = 0
+        while True:
+            adapter = ctypes.c_void_p()
+            hr = enum_adapters1(factory, index, ctypes.byref(adapter))
+            if hr != 0:
+                # DXGI_ERROR_NOT_FOUND 表示枚举结束
+                break
+            try:
+                # IDXGIAdapter1::GetDesc1 位于虚函数表第10位
+                desc = DXGI_ADAPTER_DESC1()
+                get_desc1 = com_method(adapter, 10, ctypes.POINTER(DXGI_ADAPTER_DESC1))
+                if get_desc1(adapter, ctypes.byref(desc)) == 0 and not (desc.Flags & DXGI_ADAPTER_FLAG_SOFTWARE):
+                    adapters.append((desc.VendorId, desc.Description, desc.DedicatedVideoMemory))
+            finally:
+                release(adapter)
+            index += 1
+    finally:
+        release(factory)
+    
+    return adapters
 
 
+def _get_nvidia_gpu_name():
+    """获取第一块NVIDIA显卡的型号名称。
+    优先使用NVML（进程内调用），不可用时回退到 nvidia-smi。
+    
+    Returns:
+        str: GPU型号名称，未检测到NVIDIA显卡时返回 None
+    """
+    if NVML_AVAILABLE:
+        try:
+            handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+            gpu_name = pynvml.nvmlDeviceGetName(handle)
+            # 旧版 pynvml 返回 bytes
+            if isinstance(gpu_name, bytes):
+                gpu_name = gpu_name.decode('utf-8', errors='replace')
+            return gpu_name.strip() or None
+        except Exception:
+            pass
+    
+    try:
+        result = subprocess.run(
+            ['nvidia-smi', '--query-gpu=name', '--format=csv,noheader'],
+            capture_output=True,
+            text=True,
+            timeout=2,
+            creationflags=SUBPROCESS_CREATIONFLAGS,
+            startupinfo=SUBPROCESS_STARTUPINFO
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip().split('\n')[0].strip()
+    except (OSError, subprocess.SubprocessError):
+        # 未安装NVIDIA驱动时 nvidia-smi 不存在
+        pass
+    return None
+
+
+# GPU类型的显示名称
+GPU_TYPE_DISPLAY = {'dedicated': '独显', 'integrated': '核显'}
+
+
+def format_gpu_info(gpu_brand, gpu_model, gpu_type):
+    """将 get_gpu_info_standalone() 的结果格式化为“品牌: X, 型号: Y, 类型: Z”，无信息时返回空字符串。"""
+    parts = []
+    if gpu_brand:
+        parts.append(f"品牌: {gpu_brand}")
+    if gpu_model:
+        parts.append(f"型号: {gpu_model}")
+    if gpu_type:
+        parts.append(f"类型: {GPU_TYPE_DISPLAY.get(gpu_type, '核显')}")
+    return ', '.join(parts)
+
+
+@lru_cache(maxsize=1)
+def get_nvidia_gpu_count():
+    """获取NVIDIA显卡数量（用于多卡时分配NVENC编码任务）。
+    优先使用NVML，不可用时回退到 nvidia-smi -L。结果在进程内缓存。
+    
+    Returns:
+        int: NVIDIA显卡数量，未检测到时返回 0
+    """
+    if NVML_AVAILABLE:
+        try:
+            return pynvml.nvmlDeviceGetCount()
+        except Exception:
+            pass
+    
+    try:
+        result = subprocess.run(
+            ['nvidia-smi', '-L'],
+            capture_output=True,
+            text=True,
+            timeout=2,
+            creationflags=SUBPROCESS_CREATIONFLAGS,
+            startupinfo=SUBPROCESS_STARTUPINFO
+        )
+        if result.returncode == 0:
+            return sum(1 for line in result.stdout.splitlines() if line.startswith('GPU '))
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return 0
+
+
+@lru_cache(maxsize=1)
 def get_gpu_info_standalone():
     """独立函数：获取GPU型号和品牌信息（可在任何地方调用）。
     优先检测独显，然后检测核显。
     特别注意：优先检测Intel核显，因为Intel CPU通常带有核显。
+    结果在进程内缓存，硬件在运行期间不会变化；需要重新检测时调用 clear_gpu_detection_cache()。
     
     Returns:
         Tuple[str, str, str]: (GPU品牌, GPU型号名称, GPU类型)，如果无法检测则返回(None, None, None)
@@ -211,92 +505,74 @@ def get_gpu_info_standalone():
     
     try:
         # 优先尝试检测NVIDIA独显GPU
-        result = subprocess.run(
-            ['nvidia-smi', '--query-gpu=name', '--format=csv,noheader'],
-            capture_output=True,
-            text=True,
-            timeout=2,
-            creationflags=CREATE_NO_WINDOW if sys.platform == "win32" else 0
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            gpu_name = result.stdout.strip().split('\n')[0].strip()
+        gpu_name = _get_nvidia_gpu_name()
+        if gpu_name:
             return ('NVIDIA', gpu_name, 'dedicated')
         
         # 检测所有GPU（Windows）
         if sys.platform == "win32":
-            # 优先使用PowerShell获取GPU信息（更准确）
+            # 优先使用DXGI在进程内枚举显卡（无需启动子进程）
+            try:
+                dxgi_adapters = _enum_gpu_adapters_dxgi()
+            except Exception:
+                dxgi_adapters = None
+            if dxgi_adapters:
+                for vendor_id, adapter_name, dedicated_memory in dxgi_adapters:
+                    gpu_brand = DXGI_VENDOR_MAP.get(vendor_id)
+                    if not gpu_brand:
+                        continue
+                    if dedicated_memory > DXGI_DEDICATED_MEMORY_THRESHOLD:
+                        if not dedicated_gpu:
+                            dedicated_gpu = (gpu_brand, adapter_name, 'dedicated')
+                    elif not integrated_gpu:
+                        integrated_gpu = (gpu_brand, adapter_name, 'integrated')
+                if dedicated_gpu:
+                    return dedicated_gpu
+                if integrated_gpu:
+                    return integrated_gpu
+            
+            # DXGI不可用时使用PowerShell获取GPU信息（JSON输出，解析不受本地化字段格式影响）
             result = subprocess.run(
                 ['powershell', '-Command',
-                 "Get-CimInstance -ClassName Win32_VideoController | Select-Object Name, AdapterRAM | Format-List"],
+                 "Get-CimInstance -ClassName Win32_VideoController | Select-Object Name, AdapterRAM | ConvertTo-Json -Compress"],
                 capture_output=True,
                 text=True,
-                timeout=2,
-                creationflags=CREATE_NO_WINDOW if sys.platform == "win32" else 0
+                timeout=5,  # PowerShell 冷启动 Get-CimInstance 可能超过2秒
+                creationflags=SUBPROCESS_CREATIONFLAGS,
+                startupinfo=SUBPROCESS_STARTUPINFO
             )
             if result.returncode == 0 and result.stdout.strip():
-                current_name = None
-                current_ram = None
-                for line in result.stdout.splitlines():
-                    line = line.strip()
-                    if line.startswith('Name'):
-                        current_name = line.split(':', 1)[1].strip() if ':' in line else ''
-                    elif line.startswith('AdapterRAM'):
-                        ram_str = line.split(':', 1)[1].strip() if ':' in line else ''
-                        try:
-                            current_ram = int(ram_str) if ram_str else 0
-                        except:
-                            current_ram = 0
-                        
-                        # 当获取到完整的GPU信息时处理
-                        if current_name:
-                            # Intel GPU通常是核显
-                            if 'Intel' in current_name:
-                                # Intel核显，优先返回
-                                if not integrated_gpu:
-                                    integrated_gpu = ('Intel', current_name, 'integrated')
-                            # AMD GPU
-                            elif 'AMD' in current_name or 'Radeon' in current_name:
-                                # 根据显存大小判断：通常独显显存更大（>2GB），核显较小
-                                if current_ram > 2147483648:  # >2GB，可能是独显
-                                    if not dedicated_gpu:
-                                        dedicated_gpu = ('AMD', current_name, 'dedicated')
-                                else:
-                                    if not integrated_gpu:
-                                        integrated_gpu = ('AMD', current_name, 'integrated')
-                            # 重置当前值
-                            current_name = None
-                            current_ram = None
-            
-            # 如果PowerShell检测失败，使用wmic作为备选
-            if not dedicated_gpu and not integrated_gpu:
-                result = subprocess.run(
-                    ['wmic', 'path', 'win32_VideoController', 'get', 'name,AdapterRAM'],
-                    capture_output=True,
-                    text=True,
-                    timeout=2,
-                    creationflags=CREATE_NO_WINDOW if sys.platform == "win32" else 0
-                )
-                if result.returncode == 0:
-                    lines = result.stdout.strip().split('\n')[1:]
-                    for line in lines:
-                        if not line.strip() or 'Name' in line:
-                            continue
-                        
-                        # 解析GPU名称
-                        parts = line.strip().split()
-                        if not parts:
-                            continue
-                        
-                        # 查找Intel关键字
-                        gpu_name = ' '.join(parts)
-                        if 'Intel' in gpu_name:
+                try:
+                    controllers = json.loads(result.stdout)
+                except ValueError:
+                    controllers = []
+                # 只有一个显卡时 ConvertTo-Json 输出对象而不是数组
+                if isinstance(controllers, dict):
+                    controllers = [controllers]
+                for controller in controllers:
+                    current_name = (controller.get('Name') or '').strip()
+                    try:
+                        current_ram = int(controller.get('AdapterRAM') or 0)
+                    except (TypeError, ValueError):
+                        current_ram = 0
+                    
+                    if not current_name:
+                        continue
+                    # Intel GPU通常是核显
+                    if 'Intel' in current_name:
+                        # Intel核显，优先返回
+                        if not integrated_gpu:
+                            integrated_gpu = ('Intel', current_name, 'integrated')
+                    # AMD GPU
+                    elif 'AMD' in current_name or 'Radeon' in current_name:
+                        # 根据显存大小判断：通常独显显存更大（>2GB），核显较小
+                        if current_ram > 2147483648:  # >2GB，可能是独显
+                            if not dedicated_gpu:
+                                dedicated_gpu = ('AMD', current_name, 'dedicated')
+                        else:
                             if not integrated_gpu:
-                                integrated_gpu = ('Intel', gpu_name, 'integrated')
-                        elif 'AMD' in gpu_name or 'Radeon' in gpu_name:
-                            if 'Radeon' in gpu_name and not dedicated_gpu:
-                                dedicated_gpu = ('AMD', gpu_name, 'dedicated')
-                            elif not integrated_gpu:
-                                integrated_gpu = ('AMD', gpu_name, 'integrated')
+                                integrated_gpu = ('AMD', current_name, 'integrated')
+            
         
         # 优先返回独显，如果没有独显则返回核显
         # 对于Intel系统，通常只有核显，所以会返回Intel核显
@@ -310,8 +586,66 @@ def get_gpu_info_standalone():
         return (None, None, None)
 
 
+# 匹配 ffmpeg -encoders 输出中的编码器行（例如 " V....D hevc_qsv ..."），捕获编码器名称
+ENCODER_LINE_RE = re.compile(rb'^\s*[VAS]\S{5}\s+(\S+)', re.M)
+
+# ffmpeg 能力探测结果：可用编码器集合、可用硬件加速方法集合
+FFmpegCapabilities = namedtuple('FFmpegCapabilities', ['encoders', 'hwaccels'])
+
+
+def _run_ffmpeg_probe(ffmpeg_path, option):
+    """运行 ffmpeg 信息查询（例如 -encoders），返回原始字节输出；失败时返回空字节串。"""
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, "-hide_banner", option],
+            capture_output=True,
+            timeout=5,
+            creationflags=SUBPROCESS_CREATIONFLAGS,
+            startupinfo=SUBPROCESS_STARTUPINFO
+        )
+        return result.stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"Error probing ffmpeg {option}: {e}")
+        return b''
+
+
+@lru_cache(maxsize=4)
+def probe_ffmpeg_capabilities(ffmpeg_path):
+    """探测 ffmpeg 支持的编码器和硬件加速方法（每个 ffmpeg 路径在进程内只探测一次）。
+    
+    ffmpeg 在处理第一个信息查询选项后就会退出，因此 -encoders 和 -hwaccels 分别查询，
+    但结果统一缓存，后续所有检测都直接使用缓存。
+    
+    参数:
+        ffmpeg_path: ffmpeg 可执行文件路径
+        
+    返回:
+        FFmpegCapabilities: (encoders, hwaccels)，均为 frozenset
+    """
+    # 只扫描 "------" 分隔线之后的编码器列表部分，直接处理字节输出
+    encoders_output = _run_ffmpeg_probe(ffmpeg_path, "-encoders")
+    separator = encoders_output.find(b'------')
+    if separator >= 0:
+        encoders_output = encoders_output[separator:]
+    encoders = frozenset(
+        name.decode('ascii', errors='replace') for name in ENCODER_LINE_RE.findall(encoders_output)
+    )
+    
+    # -hwaccels 输出为标题行 "Hardware acceleration methods:" 加每行一个方法名
+    hwaccels_output = _run_ffmpeg_probe(ffmpeg_path, "-hwaccels")
+    hwaccels = frozenset(
+        line.strip().decode('ascii', errors='replace')
+        for line in hwaccels_output.splitlines()[1:]
+        if line.strip()
+    )
+    
+    return FFmpegCapabilities(encoders, hwaccels)
+
+
+@lru_cache(maxsize=4)
 def detect_gpu_encoders(ffmpeg_path, codec="hevc"):
     """检测给定编解码器可用的 GPU 编码器。
+    结果按 (ffmpeg_path, codec) 缓存，编码器列表来自 probe_ffmpeg_capabilities。
     
     参数:
         ffmpeg_path: ffmpeg 可执行文件路径
@@ -321,15 +655,7 @@ def detect_gpu_encoders(ffmpeg_path, codec="hevc"):
         可用 GPU 编码器列表
     """
     try:
-        # 运行 ffmpeg -encoders 命令获取编码器列表
-        result = subprocess.run(
-            [ffmpeg_path, "-encoders"],
-            capture_output=True,
-            text=True,
-            creationflags=CREATE_NO_WINDOW if sys.platform == "win32" else 0
-        )
-        
-        encoders_output = result.stdout
+        found_encoders = probe_ffmpeg_capabilities(ffmpeg_path).encoders
         available_encoders = []
         
         # 根据编解码器定义编码器映射
@@ -350,7 +676,7 @@ def detect_gpu_encoders(ffmpeg_path, codec="hevc"):
         
         # 检查哪些编码器可用
         for encoder_key, encoder_display in encoder_mappings.items():
-            if encoder_key in encoders_output:
+            if encoder_key in found_encoders:
                 available_encoders.append((encoder_key, encoder_display))
         
         return available_encoders
@@ -359,6 +685,129 @@ def detect_gpu_encoders(ffmpeg_path, codec="hevc"):
         return []
 
 
+def clear_gpu_detection_cache():
+    """清除GPU信息、GPU编码器和ffmpeg路径的检测缓存（用于“重新检测GPU”操作）。"""
+    which_ffmpeg.cache_clear()
+    get_gpu_info_standalone.cache_clear()
+    get_nvidia_gpu_count.cache_clear()
+    detect_gpu_encoders.cache_clear()
+    select_decode_hwaccel.cache_clear()
+    probe_ffmpeg_capabilities.cache_clear()
+
+
+# HLG 元数据标签（GPU 编码器通过通用颜色参数写入）：
+#   colorprim=bt2020
+#   transfer=arib-std-b67  (HLG)
+#   colormatrix=bt2020nc
+HLG_COLOR_ARGS = (
+    "-color_primaries", "bt2020",
+    "-color_trc", "arib-std-b67",  # HLG
+    "-colorspace", "bt2020nc",
+)
+
+# GPU 编码器配置表：(codec, 编码器) -> (速率控制方式, 预设参数, 像素格式)
+#   速率控制方式: 'cq' (NVENC 使用 -cq), 'cqp' (AMF 使用 cqp + qmin/qmax), 'crf'
+#   预设参数: None 表示使用 "-preset <preset>"，否则为固定参数
+GPU_ENCODER_PROFILES = {
+    ('hevc', 'h265_nvenc'): ('cq', None, "yuv420p10le"),                       # NVIDIA
+    ('hevc', 'hevc_amf'): ('cqp', ("-quality", "quality"), "p010le"),          # AMD (AMF 使用 p010le)
+    ('hevc', 'hevc_qsv'): ('crf', None, "yuv420p10le"),                        # Intel
+    ('hevc', 'hevc_videotoolbox'): ('crf', ("-quality", "medium"), "yuv420p10le"),  # Apple Silicon
+    ('h264', 'h264_nvenc'): ('cq', None, "yuv420p"),                           # NVIDIA
+    ('h264', 'h264_amf'): ('cqp', ("-quality", "quality"), "yuv420p"),         # AMD
+    ('h264', 'h264_qsv'): ('crf', None, "yuv420p"),                            # Intel
+    ('h264', 'h264_videotoolbox'): ('crf', ("-quality", "medium"), "yuv420p"), # Apple Silicon
+}
+
+# 编码格式 -> 界面显示名称（编码格式下拉框按此顺序列出，选项数据为编码格式）
+CODEC_DISPLAY = {'hevc': 'H.265 (HEVC)', 'h264': 'H.264 (AVC)'}
+
+# GPU编码器所属品牌（用于编码器回退时的提示信息）
+GPU_ENCODER_BRANDS = {
+    'h265_nvenc': 'NVIDIA',
+    'h264_nvenc': 'NVIDIA',
+    'hevc_qsv': 'Intel',
+    'h264_qsv': 'Intel',
+    'hevc_amf': 'AMD',
+    'h264_amf': 'AMD',
+}
+
+# NVIDIA NVENC 编码器（支持通过 -gpu 选择显卡）
+NVENC_ENCODERS = frozenset(('h265_nvenc', 'h264_nvenc'))
+
+# 各编码格式的GPU编码器优先级：NVIDIA > Intel > AMD
+GPU_ENCODER_PRIORITY = {
+    'hevc': ('h265_nvenc', 'hevc_qsv', 'hevc_amf'),
+    'h264': ('h264_nvenc', 'h264_qsv', 'h264_amf'),
+}
+
+# 各编码格式下与GPU品牌对应的编码器
+GPU_BRAND_ENCODERS = {
+    'hevc': {'NVIDIA': 'h265_nvenc', 'AMD': 'hevc_amf', 'Intel': 'hevc_qsv'},
+    'h264': {'NVIDIA': 'h264_nvenc', 'AMD': 'h264_amf', 'Intel': 'h264_qsv'},
+}
+
+# 各GPU编码器可配合使用的硬件解码方式（按优先级排列，取 ffmpeg 支持的第一个）
+#   只指定 -hwaccel 而不指定 -hwaccel_output_format：硬件无法解码当前格式时
+#   （例如多数显卡不支持 10-bit 4:2:2），ffmpeg 会自动回退到软件解码
+GPU_DECODE_HWACCELS = {
+    'h265_nvenc': ('cuda', 'd3d11va'),
+    'h264_nvenc': ('cuda', 'd3d11va'),
+    'hevc_qsv': ('d3d11va', 'vaapi'),
+    'h264_qsv': ('d3d11va', 'vaapi'),
+    'hevc_amf': ('d3d11va',),
+    'h264_amf': ('d3d11va',),
+    'hevc_videotoolbox': ('videotoolbox',),
+    'h264_videotoolbox': ('videotoolbox',),
+}
+
+# CPU 编码器配置表：codec -> (编码器, 参数选项, 编码器参数, 像素格式, 线程数参数名)
+#   线程数参数名: 限制编码器线程数时追加到编码器参数中的键（x265 使用线程池 pools）
+CPU_ENCODER_PROFILES = {
+    'hevc': (
+        "libx265", "-x265-params",
+        "profile=main10:level=5.1:colorprim=bt2020:transfer=arib-std-b67:colormatrix=bt2020nc",
+        "yuv420p10le", "pools",
+    ),
+    'h264': (
+        "libx264", "-x264-params",
+        "profile=high:level=5.1:colorprim=bt2020:transfer=arib-std-b67:colormatrix=bt2020nc",
+        "yuv420p", "threads",
+    ),
+}
+
+
+def _rate_control_args(rate_control: str, crf: str) -> Tuple[str, ...]:
+    """返回给定速率控制方式的 ffmpeg 参数。"""
+    if rate_control == 'cq':
+        return ("-cq", crf)  # NVENC 使用 -cq 而不是 -crf
+    if rate_control == 'cqp':
+        # AMD AMF 使用 cqp 模式，qmin 与 qmax 相同以实现 CRF 效果
+        return ("-rc", "cqp", "-qmin", crf, "-qmax", crf)
+    return ("-crf", crf)
+
+
+@lru_cache(maxsize=16)
+def select_decode_hwaccel(ffmpeg_path: str, gpu_encoder: Optional[str]) -> Optional[str]:
+    """为GPU编码器选择 ffmpeg 支持的硬件解码方式。
+    
+    参数:
+        ffmpeg_path: ffmpeg 可执行文件路径
+        gpu_encoder: GPU 编码器名称
+        
+    返回:
+        Optional[str]: -hwaccel 的取值；没有可用的硬件解码方式时返回 None
+    """
+    candidates = GPU_DECODE_HWACCELS.get(gpu_encoder)
+    if not candidates:
+        return None
+    hwaccels = probe_ffmpeg_capabilities(ffmpeg_path).hwaccels
+    for hwaccel in candidates:
+        if hwaccel in hwaccels:
+            return hwaccel
+    return None
+
+
 def build_ffmpeg_cmd_gpu(
     ffmpeg: str,
     in_file: Path,
@@ -369,7 +818,11 @@ def build_ffmpeg_cmd_gpu(
     fps: Optional[float],
     audio_bitrate: str,
     overwrite: bool,
-    gpu_encoder: Optional[str]
+    gpu_encoder: Optional[str],
+    cpu_threads: Optional[int] = None,
+    gpu_index: Optional[int] = None,
+    hwaccel: Optional[str] = None,
+    max_bitrate: Optional[int] = None
 ) -> List[str]:
     """构建 ffmpeg 命令，用于将 Sony HLG 视频转码为手机兼容格式。
     如果提供了 gpu_encoder，则使用 GPU 加速。
@@ -385,182 +838,271 @@ def build_ffmpeg_cmd_gpu(
         audio_bitrate: 音频比特率（例如 '192k'）
         overwrite: 是否覆盖现有输出文件
         gpu_encoder: 要使用的 GPU 编码器（H.265: h265_nvenc, hevc_amf, hevc_qsv, hevc_videotoolbox; H.264: h264_nvenc, h264_amf, h264_qsv, h264_videotoolbox），或 None 表示使用 CPU 编码
+        cpu_threads: CPU 编码时每个 ffmpeg 进程使用的线程数（None 表示由编码器自动决定）
+        gpu_index: NVENC 编码使用的显卡序号（None 表示由驱动选择，通常为第一块显卡）
+        hwaccel: GPU 编码时使用的硬件解码方式（见 select_decode_hwaccel），None 表示软件解码
+        max_bitrate: 视频最大码率（Mbps），在CRF/CQ质量模式基础上限制码率峰值；None 表示不限制
         
     返回:
         List[str]: ffmpeg 命令作为参数列表
     """
-    # HLG 元数据标签：
-    #   colorprim=bt2020
-    #   transfer=arib-std-b67  (HLG)
-    #   colormatrix=bt2020nc
+    # 预先转换路径和数值参数，避免重复 str() 转换
+    in_s = os.fspath(in_file)
+    out_s = os.fspath(out_file)
+    crf_s = str(crf)
+    
+    # 查找 GPU 编码器配置；未指定或不支持的编码器回退到 CPU 编码
+    profile = GPU_ENCODER_PROFILES.get((codec, gpu_encoder)) if gpu_encoder is not None else None
+    
     cmd = [
         ffmpeg,
         "-hide_banner",
         "-y" if overwrite else "-n",
-        "-i",
-        str(in_file),
-        "-map",
-        "0:v:0",
-        "-map",
-        "0:a?",
     ]
     
-    # 如果指定了 GPU 编码器，使用 GPU 编码
-    if gpu_encoder is not None:
-        if codec == 'hevc':  # H.265
-            if gpu_encoder == "h265_nvenc":  # NVIDIA
-                cmd += [
-                    "-c:v", "h265_nvenc",
-                    "-preset", preset.lower(),  # nvenc 预设: p1-p7, default, ll, llhq, llhp, lossless, losslesshp
-                    "-cq", str(crf),  # NVENC 使用 -cq 而不是 -crf
-                    "-pix_fmt", "yuv420p10le",
-                    "-color_primaries", "bt2020",
-                    "-color_trc", "arib-std-b67",  # HLG
-                    "-colorspace", "bt2020nc",
-                ]
-            elif gpu_encoder == "hevc_amf":  # AMD
-                cmd += [
-                    "-c:v", "hevc_amf",
-                    "-quality", "quality",  # amf 预设: speed, balanced, quality
-                    "-rc", "cqp",  # AMD AMF使用cqp模式而不是crf
-                    "-qmin", str(crf),  # 设置最小量化参数
-                    "-qmax", str(crf),  # 设置最大量化参数（与qmin相同以实现CRF效果）
-                    "-pix_fmt", "p010le",  # AMD AMF使用p010le格式而不是yuv420p10le
-                    "-color_primaries", "bt2020",
-                    "-color_trc", "arib-std-b67",  # HLG
-                    "-colorspace", "bt2020nc",
-                ]
-            elif gpu_encoder == "hevc_qsv":  # Intel
-                cmd += [
-                    "-c:v", "hevc_qsv",
-                    "-preset", preset.lower(),  # qsv 预设: veryfast, fast, medium, slow, veryslow
-                    "-crf", str(crf),
-                    "-pix_fmt", "yuv420p10le",
-                    "-color_primaries", "bt2020",
-                    "-color_trc", "arib-std-b67",  # HLG
-                    "-colorspace", "bt2020nc",
-                ]
-            elif gpu_encoder == "hevc_videotoolbox":  # Apple Silicon
-                cmd += [
-                    "-c:v", "hevc_videotoolbox",
-                    "-quality", "medium",  # videotoolbox 预设: low, medium, high
-                    "-crf", str(crf),
-                    "-pix_fmt", "yuv420p10le",
-                    "-color_primaries", "bt2020",
-                    "-color_trc", "arib-std-b67",  # HLG
-                    "-colorspace", "bt2020nc",
-                ]
-            else:
-                # 如果 GPU 编码器不支持，回退到 CPU 编码
-                x265_params = (
-                    "profile=main10:level=5.1:" 
-                    "colorprim=bt2020:transfer=arib-std-b67:colormatrix=bt2020nc"
-                )
-                cmd += [
-                    "-c:v", "libx265",
-                    "-preset", preset,
-                    "-crf", str(crf),
-                    "-pix_fmt", "yuv420p10le",
-                    "-x265-params", x265_params,
-                ]
-        else:  # H.264
-            if "nvenc" in gpu_encoder or "h264_nvenc" in gpu_encoder:  # NVIDIA
-                cmd += [
-                    "-c:v", "h264_nvenc",
-                    "-preset", preset.lower(),
-                    "-cq", str(crf),  # NVENC 使用 -cq 而不是 -crf
-                    "-pix_fmt", "yuv420p",
-                    "-color_primaries", "bt2020",
-                    "-color_trc", "arib-std-b67",  # HLG
-                    "-colorspace", "bt2020nc",
-                ]
-            elif "amf" in gpu_encoder or "h264_amf" in gpu_encoder:  # AMD
-                cmd += [
-                    "-c:v", "h264_amf",
-                    "-quality", "quality",
-                    "-rc", "cqp",  # AMD AMF使用cqp模式而不是crf
-                    "-qmin", str(crf),  # 设置最小量化参数
-                    "-qmax", str(crf),  # 设置最大量化参数（与qmin相同以实现CRF效果）
-                    "-pix_fmt", "yuv420p",
-                    "-color_primaries", "bt2020",
-                    "-color_trc", "arib-std-b67",  # HLG
-                    "-colorspace", "bt2020nc",
-                ]
-            elif "qsv" in gpu_encoder or "h264_qsv" in gpu_encoder:  # Intel
-                cmd += [
-                    "-c:v", "h264_qsv",
-                    "-preset", preset.lower(),
-                    "-crf", str(crf),
-                    "-pix_fmt", "yuv420p",
-                    "-color_primaries", "bt2020",
-                    "-color_trc", "arib-std-b67",  # HLG
-                    "-colorspace", "bt2020nc",
-                ]
-            elif "videotoolbox" in gpu_encoder or "h264_videotoolbox" in gpu_encoder:  # Apple Silicon
-                cmd += [
-                    "-c:v", "h264_videotoolbox",
-                    "-quality", "medium",
-                    "-crf", str(crf),
-                    "-pix_fmt", "yuv420p",
-                    "-color_primaries", "bt2020",
-                    "-color_trc", "arib-std-b67",  # HLG
-                    "-colorspace", "bt2020nc",
-                ]
-            else:
-                # 如果 GPU 编码器不支持，回退到 CPU 编码
-                x264_params = (
-                    "profile=high:level=5.1:" 
-                    "colorprim=bt2020:transfer=arib-std-b67:colormatrix=bt2020nc"
-                )
-                cmd += [
-                    "-c:v", "libx264",
-                    "-preset", preset,
-                    "-crf", str(crf),
-                    "-pix_fmt", "yuv420p",
-                    "-x264-params", x264_params,
-                ]
+    # GPU 编码时尽量使用硬件解码，减少CPU解码负载
+    if profile is not None and hwaccel:
+        cmd.extend(("-hwaccel", hwaccel))
+        if hwaccel == 'cuda' and gpu_index is not None:
+            # 解码与编码使用同一块显卡
+            cmd.extend(("-hwaccel_device", str(gpu_index)))
+    
+    cmd.extend((
+        "-i", in_s,
+        "-map", "0:v:0",
+        "-map", "0:a?",
+    ))
+    
+    if profile is not None:
+        rate_control, preset_args, pix_fmt = profile
+        cmd.extend(("-c:v", gpu_encoder))
+        if gpu_index is not None and gpu_encoder in NVENC_ENCODERS:
+            cmd.extend(("-gpu", str(gpu_index)))
+        cmd.extend(preset_args if preset_args is not None else ("-preset", preset.lower()))
+        cmd.extend(_rate_control_args(rate_control, crf_s))
+        cmd.extend(("-pix_fmt", pix_fmt))
+        cmd.extend(HLG_COLOR_ARGS)
     else:
-        # 当 GPU 加速被禁用时使用 CPU 编码
-        if codec == 'hevc':  # H.265
-            x265_params = (
-                "profile=main10:level=5.1:" 
-                "colorprim=bt2020:transfer=arib-std-b67:colormatrix=bt2020nc"
-            )
-            cmd += [
-                "-c:v", "libx265",
-                "-preset", preset,
-                "-crf", str(crf),
-                "-pix_fmt", "yuv420p10le",
-                "-x265-params", x265_params,
-            ]
-        else:  # H.264
-            x264_params = (
-                "profile=high:level=5.1:" 
-                "colorprim=bt2020:transfer=arib-std-b67:colormatrix=bt2020nc"
-            )
-            cmd += [
-                "-c:v", "libx264",
-                "-preset", preset,
-                "-crf", str(crf),
-                "-pix_fmt", "yuv420p",
-                "-x264-params", x264_params,
-            ]
+        encoder, params_flag, encoder_params, pix_fmt, threads_key = CPU_ENCODER_PROFILES.get(codec, CPU_ENCODER_PROFILES['h264'])
+        if cpu_threads:
+            # 多个ffmpeg并行时限制每个进程的线程数，避免线程数远超核心数
+            threads_s = str(cpu_threads)
+            encoder_params = f"{encoder_params}:{threads_key}={threads_s}"
+            cmd.extend(("-threads", threads_s))
+        cmd.extend((
+            "-c:v", encoder,
+            "-preset", preset,
+            "-crf", crf_s,
+            "-pix_fmt", pix_fmt,
+            params_flag, encoder_params,
+        ))
+    
+    if max_bitrate:
+        # 限制码率峰值（VBV），缓冲区取两秒的最大码率
+        cmd.extend(("-maxrate", f"{max_bitrate}M", "-bufsize", f"{max_bitrate * 2}M"))
     
     # 通用设置
-    cmd += [
+    cmd.extend((
         "-tag:v", "hvc1" if codec == 'hevc' else "avc1",  # 为编解码器使用适当的标签
         "-c:a", "aac",
         "-b:a", audio_bitrate,
         "-movflags", "+faststart",  # 更适合手机流媒体/预览
-    ]
+        # 通过 stdout 输出机器可读的进度（key=value），stderr 只保留错误信息
+        "-progress", "pipe:1",
+        "-nostats",
+        "-loglevel", "error",
+    ))
     
     if fps is not None:
-        cmd += ["-r", str(fps)]
+        cmd.extend(("-r", str(fps)))
     
-    cmd += [str(out_file)]
+    cmd.append(out_s)
     return cmd
 
 
+# 每个CPU编码ffmpeg进程大致占用的核心数，用于估算CPU编码的并发数
+CPU_THREADS_PER_FFMPEG = 4
+
+# 各GPU编码器可安全同时运行的编码会话数
+# NVIDIA 消费级显卡有会话数限制，保守使用1；Intel QSV / AMD AMF 可稳定并行2路
+GPU_ENCODER_MAX_CONCURRENT_JOBS = {
+    'h265_nvenc': 1,
+    'h264_nvenc': 1,
+    'hevc_qsv': 2,
+    'h264_qsv': 2,
+    'hevc_amf': 2,
+    'h264_amf': 2,
+    'hevc_videotoolbox': 1,
+    'h264_videotoolbox': 1,
+}
+
+
+def get_max_concurrent_jobs(gpu_encoder: Optional[str], requested: int) -> int:
+    """根据编码器的硬件并发能力计算同时转码的文件数量。
+    
+    Args:
+        gpu_encoder: GPU编码器名称，None 表示使用CPU编码
+        requested: 用户设置的并行数量
+        
+    Returns:
+        int: 实际使用的并发数量（至少为1，且不超过 requested）
+    """
+    if gpu_encoder:
+        hardware_limit = GPU_ENCODER_MAX_CONCURRENT_JOBS.get(gpu_encoder, 1)
+        if gpu_encoder in NVENC_ENCODERS:
+            # 多块NVIDIA显卡时，每块显卡各自承担编码会话
+            hardware_limit *= max(1, get_nvidia_gpu_count())
+    else:
+        hardware_limit = max(1, (os.cpu_count() or 1) // CPU_THREADS_PER_FFMPEG)
+    return max(1, min(requested, hardware_limit))
+
+
+def get_cpu_threads_per_job(jobs: int) -> Optional[int]:
+    """计算CPU编码时每个ffmpeg进程应使用的线程数。
+    
+    Args:
+        jobs: 同时运行的ffmpeg进程数量
+        
+    Returns:
+        Optional[int]: 每个进程的线程数；只有一个进程时返回 None（不限制）
+    """
+    if jobs <= 1:
+        return None
+    return max(1, (os.cpu_count() or 1) // jobs)
+
+
+def resolve_encoder_order(ffmpeg: str, gpu_encoder: Optional[str], codec: str) -> List[Optional[str]]:
+    """计算GPU编码器的尝试顺序（每次转码运行只需计算一次）。
+    
+    用户指定的编码器优先，然后按优先级 NVIDIA > Intel > AMD 添加其他可用的编码器。
+    
+    Args:
+        ffmpeg: ffmpeg 可执行文件路径
+        gpu_encoder: 用户指定的GPU编码器
+        codec: 编码格式 ('hevc' 或 'h264')
+        
+    Returns:
+        List[Optional[str]]: 按顺序尝试的编码器列表；[None] 表示直接使用CPU编码
+    """
+    try:
+        detected_encoders = detect_gpu_encoders(str(ffmpeg), codec)
+        
+        # 按优先级排序可用的编码器
+        available_encoders = []
+        detected_names = {key for key, _ in detected_encoders}
+        
+        # 首先添加用户指定的编码器（如果可用）
+        if gpu_encoder in detected_names:
+            available_encoders.append(gpu_encoder)
+        
+        # 然后按优先级顺序添加其他可用的编码器（排除已添加的）
+        for priority_encoder in GPU_ENCODER_PRIORITY.get(codec, GPU_ENCODER_PRIORITY['h264']):
+            if priority_encoder in detected_names and priority_encoder not in available_encoders:
+                available_encoders.append(priority_encoder)
+        
+        # 如果没有可用编码器，直接使用 CPU
+        if not available_encoders:
+            available_encoders = [None]  # 标记为使用CPU
+    except Exception:
+        # 如果检测失败，使用指定的编码器
+        available_encoders = [gpu_encoder]
+    return available_encoders
+
+
+# 保护 existing_outputs 的“检查并登记”操作：并行任务在工作线程中同时读写该集合
+EXISTING_OUTPUTS_LOCK = threading.Lock()
+
+
+def scan_existing_outputs(output_dir: Path) -> Optional[set]:
+    """一次性扫描输出目录，返回已存在的文件名集合（按平台规则规范大小写）。
+    
+    Args:
+        output_dir: 输出目录路径
+        
+    Returns:
+        set: 已存在的文件名集合；目录无法读取时返回 None（回退到逐个文件检查）
+    """
+    try:
+        with os.scandir(output_dir) as entries:
+            return {os.path.normcase(entry.name) for entry in entries if entry.is_file()}
+    except OSError:
+        return None
+
+
+def make_output_namer(
+    keep_original_name: bool,
+    custom_filename: bool,
+    custom_filename_text: str,
+    add_timestamp: bool,
+    custom_suffix: str,
+    total_files: int = 1
+) -> Callable[[Path, int, str], str]:
+    """根据用户的命名设置构建输出文件名生成函数（每批次构建一次）。
+    
+    处理多个文件时，自定义文件名会按文件序号（从1开始）添加 _0001 形式的编号，避免输出文件名冲突。
+    
+    Args:
+        keep_original_name: 是否保留原始文件名
+        custom_filename: 是否使用自定义文件名
+        custom_filename_text: 自定义文件名
+        add_timestamp: 是否添加时间戳
+        custom_suffix: 自定义后缀
+        total_files: 本批次的文件数量
+        
+    Returns:
+        Callable: name_fn(in_file, index, timestamp) -> 输出文件名（带 .mp4 扩展名），
+        timestamp 为 %Y%m%d_%H%M%S 格式的时间戳
+    """
+    # 自定义文件名：去掉空白和 .mp4 扩展名
+    custom_base = custom_filename_text.strip()
+    if custom_base.endswith('.mp4'):
+        custom_base = custom_base[:-4]
+    
+    # 基础名称
+    if custom_filename and total_files > 1:
+        def base_name(in_file, index, timestamp):
+            return f"{custom_base}_{index+1:04d}"
+    elif custom_filename and custom_filename_text:
+        def base_name(in_file, index, timestamp):
+            return custom_base
+    elif keep_original_name:
+        def base_name(in_file, index, timestamp):
+            return in_file.stem
+    else:
+        # Generate a unique name if not keeping original (只保留到秒，不包含毫秒)
+        def base_name(in_file, index, timestamp):
+            return f"video_{timestamp}"
+    
+    # 自定义后缀和扩展名
+    tail = f"{custom_suffix}.mp4" if custom_suffix else ".mp4"
+    
+    if add_timestamp:
+        def name_fn(in_file, index, timestamp):
+            return f"{base_name(in_file, index, timestamp)}_{timestamp}{tail}"
+    else:
+        def name_fn(in_file, index, timestamp):
+            return f"{base_name(in_file, index, timestamp)}{tail}"
+    return name_fn
+
+
+# process_file 在 cpu_fallback=False 且所有GPU编码器都失败时返回的消息前缀
+CPU_FALLBACK_PENDING = "PENDING (CPU回退)"
+
+
+class TranscodeCancelled(Exception):
+    """转码被用户取消（process_file 内部使用，取消后不再尝试其他编码器）。"""
+
+
+def remove_partial_file(partial_file: Optional[Path]) -> None:
+    """删除未完成编码留下的临时输出文件（不存在时忽略）。"""
+    if partial_file is None:
+        return
+    try:
+        partial_file.unlink()
+    except OSError:
+        pass
+
+
 def process_file(
     in_file: Path,
     output_dir: Path,
@@ -580,7 +1122,20 @@ def process_file(
     custom_filename: bool = False,
     custom_filename_text: str = '',
     add_timestamp: bool = False,
-    custom_suffix: str = '_hlg_phone'
+    custom_suffix: str = '_hlg_phone',
+    is_paused: Optional[callable] = None,
+    status_callback: Optional[callable] = None,
+    ordered_encoders: Optional[List[Optional[str]]] = None,
+    existing_outputs: Optional[set] = None,
+    cpu_threads: Optional[int] = None,
+    gpu_index: Optional[int] = None,
+    name_fn: Optional[Callable[[Path, int, str], str]] = None,
+    index: int = 0,
+    file_progress_callback: Optional[callable] = None,
+    duration: Optional[float] = None,
+    cpu_fallback: bool = True,
+    max_bitrate: Optional[int] = None,
+    cancel_event: Optional[threading.Event] = None
 ) -> Tuple[bool, str]:
     """Process a single video file.
     Uses GPU acceleration if gpu_encoder is provided.
@@ -604,100 +1159,100 @@ def process_file(
         custom_filename_text: Custom filename text (if custom_filename is True)
         add_timestamp: Whether to add timestamp
         custom_suffix: Custom suffix to add
+        is_paused: Callable returning True while processing should pause (optional)
+        status_callback: Function to call with status messages (optional)
+        ordered_encoders: Encoders to try in order, from resolve_encoder_order (optional)
+        existing_outputs: Output filenames already present, from scan_existing_outputs (optional)
+        cpu_threads: Threads per ffmpeg process for CPU encoding (optional)
+        gpu_index: NVIDIA GPU index for NVENC encoders (optional)
+        name_fn: Output name function from make_output_namer; overrides the naming flags (optional)
+        index: Index of this file in the batch, passed to name_fn
+        file_progress_callback: Function to call with encoding progress (filename, '处理中', percent) (optional)
+        duration: Source duration in seconds; probed with ffprobe when needed and not given (optional)
+        cpu_fallback: Whether to fall back to CPU encoding here when all GPU encoders fail;
+            if False, returns (False, CPU_FALLBACK_PENDING message) and leaves it to the caller
+        max_bitrate: Maximum video bitrate in Mbps (optional)
+        cancel_event: Event that stops the running ffmpeg when set; the file is then
+            reported as "CANCELLED" without trying other encoders (optional)
         
     Returns:
         Tuple[bool, str]: (success, message)
     """
+    partial_file = None
     try:
-        import datetime
+        # 文件名时间戳（只保留到秒，不包含毫秒），同一文件内只生成一次
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
         
         # 根据用户偏好生成输出名称
-        # 基础名称
-        if custom_filename and custom_filename_text:
-            # 使用自定义文件名
-            base_name = custom_filename_text.strip()
-            # 如果自定义文件名包含扩展名，移除它
-            if base_name.endswith('.mp4'):
-                base_name = base_name[:-4]
-            # 注意：如果处理多个文件，建议在文件名中添加序号以避免冲突
-            # 这里保持简单，用户可以通过添加时间戳来区分
-        elif keep_original_name:
-            base_name = in_file.stem
-        else:
-            # Generate a unique name if not keeping original (只保留到秒，不包含毫秒)
-            base_name = f"video_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
-        # 如果请求，添加时间戳
-        if add_timestamp:
-            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-            base_name = f"{base_name}_{timestamp}"
-        
-        # 添加自定义后缀
-        if custom_suffix:
-            base_name = f"{base_name}{custom_suffix}"
-        
-        # 完成输出名称（带扩展名）
-        out_name = f"{base_name}.mp4"
+        if name_fn is None:
+            name_fn = make_output_namer(
+                keep_original_name, custom_filename, custom_filename_text, add_timestamp, custom_suffix
+            )
+        out_name = name_fn(in_file, index, timestamp)
         out_file = output_dir / out_name
 
-        if out_file.exists() and not overwrite:
+        # 优先使用批量扫描得到的已存在文件集合，避免每个文件单独 stat
+        # 检查与登记本批次将生成的输出文件名在同一把锁内完成，
+        # 避免两个并行任务同时判定同名输出不存在而写入同一文件
+        if existing_outputs is not None:
+            out_key = os.path.normcase(out_name)
+            with EXISTING_OUTPUTS_LOCK:
+                out_exists = out_key in existing_outputs
+                if not dry_run and (overwrite or not out_exists):
+                    existing_outputs.add(out_key)
+        else:
+            out_exists = out_file.exists()
+        
+        if out_exists and not overwrite:
             if skip_existing:
                 return (True, f"SKIP (exists): {out_file.name}")
+            # 与 ffmpeg -n 相同：不覆盖已存在的输出
+            return (False, f"FAILED (exists): {out_file.name}")
+        
+        # 先写入临时文件，编码成功后再改名为最终文件名：取消、失败或中断的编码
+        # 不会留下被下次运行当作已完成而跳过的不完整文件
+        partial_file = out_file.with_name(out_file.stem + PARTIAL_SUFFIX)
+        
+        # 根据 ffmpeg 输出的已编码时长计算单个文件的进度
+        encode_progress = None
+        if file_progress_callback and not (dry_run or test_mode):
+            if duration is None:
+                duration = probe_duration(ffmpeg, in_file)
+            if duration:
+                duration_us = duration * 1_000_000
+                file_name = in_file.name
+                
+                def encode_progress(out_time_us):
+                    # 编码完成前最多显示 99%，完成状态由调用方发送
+                    file_progress_callback(file_name, '处理中', min(99, int(out_time_us * 100 / duration_us)))
+        
+        def encode(cmd):
+            rc = run(cmd, dry_run=dry_run, test_mode=test_mode, is_paused=is_paused,
+                     progress_callback=encode_progress, cancel_event=cancel_event)
+            if cancel_event is not None and cancel_event.is_set():
+                raise TranscodeCancelled
+            if not (dry_run or test_mode):
+                if rc == 0:
+                    os.replace(partial_file, out_file)
+                else:
+                    # 失败的编码（包括回退前的GPU尝试）留下的临时文件
+                    remove_partial_file(partial_file)
+            return rc
         
-        # 检查是否从TranscodeWorker线程调用
-        import inspect
-        frame = inspect.currentframe().f_back
-        is_paused = None
-        status_callback = None
-        while frame:
-            if 'self' in frame.f_locals and hasattr(frame.f_locals['self'], 'is_paused'):
-                # 从工作线程获取 is_paused 标志
-                worker_self = frame.f_locals['self']
-                is_paused = lambda: getattr(worker_self, 'is_paused', False)
-                # 尝试获取状态更新回调
-                if hasattr(worker_self, 'status_updated'):
-                    status_callback = worker_self.status_updated.emit
-                break
-            frame = frame.f_back
-
         # 如果启用了GPU编码，按优先级依次尝试GPU编码器
         if gpu_encoder:
-            # 获取所有可用的GPU编码器，按优先级排序：NVIDIA > Intel > AMD
-            try:
-                ffmpeg_path = which_ffmpeg()
-                detected_encoders = detect_gpu_encoders(ffmpeg_path, codec)
-                
-                # 定义编码器优先级顺序
-                if codec == 'hevc':
-                    priority_order = ['h265_nvenc', 'hevc_qsv', 'hevc_amf']
-                else:  # h264
-                    priority_order = ['h264_nvenc', 'h264_qsv', 'h264_amf']
-                
-                # 按优先级排序可用的编码器
-                available_encoders = []
-                encoder_dict = {key: display for key, display in detected_encoders}
-                
-                # 首先添加用户指定的编码器（如果可用）
-                if gpu_encoder in encoder_dict:
-                    available_encoders.append(gpu_encoder)
-                
-                # 然后按优先级顺序添加其他可用的编码器（排除已添加的）
-                for priority_encoder in priority_order:
-                    if priority_encoder in encoder_dict and priority_encoder not in available_encoders:
-                        available_encoders.append(priority_encoder)
-                
-                # 如果没有可用编码器，直接使用 CPU
-                if not available_encoders:
-                    available_encoders = [None]  # 标记为使用CPU
-            except:
-                # 如果检测失败，使用指定的编码器
-                available_encoders = [gpu_encoder]
+            # 使用预先计算好的编码器尝试顺序（未提供时在此计算）
+            available_encoders = ordered_encoders
+            if available_encoders is None:
+                available_encoders = resolve_encoder_order(ffmpeg, gpu_encoder, codec)
             
             # 按优先级依次尝试编码器
             last_error = None
             for encoder_to_try in available_encoders:
                 if encoder_to_try is None:
                     # 使用CPU编码
+                    if not cpu_fallback:
+                        return (False, f"{CPU_FALLBACK_PENDING}: {in_file.name}")
                     if status_callback:
                         status_callback(f"所有GPU编码器失败，切换到CPU编码: {in_file.name}")
                     elif not dry_run:
@@ -706,32 +1261,26 @@ def process_file(
                     cmd = build_ffmpeg_cmd_gpu(
                         ffmpeg=ffmpeg,
                         in_file=in_file,
-                        out_file=out_file,
+                        out_file=partial_file,
                         codec=codec,
                         crf=crf,
                         preset=preset,
                         fps=fps,
                         audio_bitrate=audio_bitrate,
-                        overwrite=overwrite,
-                        gpu_encoder=None
+                        overwrite=True,  # 临时文件总是覆盖写入
+                        gpu_encoder=None,
+                        cpu_threads=cpu_threads,
+                        max_bitrate=max_bitrate
                     )
                     
-                    rc = run(cmd, dry_run=dry_run, test_mode=test_mode, is_paused=is_paused)
+                    rc = encode(cmd)
                     if rc == 0:
                         return (True, f"OK (CPU回退): {in_file.name}")
                     else:
                         return (False, f"FAILED (所有编码器都失败): {in_file.name} (exit code {rc})")
                 
                 # 尝试当前编码器
-                encoder_name_map = {
-                    'h265_nvenc': 'NVIDIA',
-                    'h264_nvenc': 'NVIDIA',
-                    'hevc_qsv': 'Intel',
-                    'h264_qsv': 'Intel',
-                    'hevc_amf': 'AMD',
-                    'h264_amf': 'AMD'
-                }
-                encoder_brand = encoder_name_map.get(encoder_to_try, 'Unknown')
+                encoder_brand = GPU_ENCODER_BRANDS.get(encoder_to_try, 'Unknown')
                 
                 if status_callback and encoder_to_try != gpu_encoder:
                     status_callback(f"尝试{encoder_brand}编码器 ({encoder_to_try}): {in_file.name}")
@@ -741,17 +1290,20 @@ def process_file(
                 cmd = build_ffmpeg_cmd_gpu(
                     ffmpeg=ffmpeg,
                     in_file=in_file,
-                    out_file=out_file,
+                    out_file=partial_file,
                     codec=codec,
                     crf=crf,
                     preset=preset,
                     fps=fps,
                     audio_bitrate=audio_bitrate,
-                    overwrite=overwrite,
-                    gpu_encoder=encoder_to_try
+                    overwrite=True,  # 临时文件总是覆盖写入
+                    gpu_encoder=encoder_to_try,
+                    gpu_index=gpu_index,
+                    hwaccel=select_decode_hwaccel(ffmpeg, encoder_to_try),
+                    max_bitrate=max_bitrate
                 )
                 
-                rc = run(cmd, dry_run=dry_run, test_mode=test_mode, is_paused=is_paused)
+                rc = encode(cmd)
                 
                 if rc == 0:
                     # 成功，保存使用的GPU编码器到配置文件
@@ -772,6 +1324,8 @@ def process_file(
                     continue
             
             # 所有GPU编码器都失败了，使用CPU编码
+            if not cpu_fallback:
+                return (False, f"{CPU_FALLBACK_PENDING}: {in_file.name}")
             if status_callback:
                 status_callback(f"所有GPU编码器失败，切换到CPU编码: {in_file.name}")
             elif not dry_run:
@@ -780,17 +1334,19 @@ def process_file(
             cmd = build_ffmpeg_cmd_gpu(
                 ffmpeg=ffmpeg,
                 in_file=in_file,
-                out_file=out_file,
+                out_file=partial_file,
                 codec=codec,
                 crf=crf,
                 preset=preset,
                 fps=fps,
                 audio_bitrate=audio_bitrate,
-                overwrite=overwrite,
-                gpu_encoder=None  # 使用CPU编码
+                overwrite=True,  # 临时文件总是覆盖写入
+                gpu_encoder=None,  # 使用CPU编码
+                cpu_threads=cpu_threads,
+                max_bitrate=max_bitrate
             )
             
-            rc = run(cmd, dry_run=dry_run, test_mode=test_mode, is_paused=is_paused)
+            rc = encode(cmd)
             if rc == 0:
                 return (True, f"OK (CPU回退): {in_file.name}")
             else:
@@ -800,22 +1356,28 @@ def process_file(
             cmd = build_ffmpeg_cmd_gpu(
                 ffmpeg=ffmpeg,
                 in_file=in_file,
-                out_file=out_file,
+                out_file=partial_file,
                 codec=codec,
                 crf=crf,
                 preset=preset,
                 fps=fps,
                 audio_bitrate=audio_bitrate,
-                overwrite=overwrite,
-                gpu_encoder=None
+                overwrite=True,  # 临时文件总是覆盖写入
+                gpu_encoder=None,
+                cpu_threads=cpu_threads,
+                max_bitrate=max_bitrate
             )
             
-            rc = run(cmd, dry_run=dry_run, test_mode=test_mode, is_paused=is_paused)
+            rc = encode(cmd)
             if rc == 0:
                 return (True, f"OK: {in_file.name}")
             else:
                 return (False, f"FAILED: {in_file.name} (exit code {rc})")
+    except TranscodeCancelled:
+        remove_partial_file(partial_file)
+        return (False, f"CANCELLED: {in_file.name}")
     except Exception as e:
+        remove_partial_file(partial_file)
         return (False, f"ERROR: {in_file.name} - {str(e)}")
     finally:
         if progress:
@@ -842,7 +1404,13 @@ def process_files_sequential(
     add_timestamp: bool = False,
     custom_suffix: str = '_hlg_phone',
     progress_callback: Optional[callable] = None,
-    file_progress_callback: Optional[callable] = None
+    file_progress_callback: Optional[callable] = None,
+    is_paused: Optional[callable] = None,
+    status_callback: Optional[callable] = None,
+    ordered_encoders: Optional[List[Optional[str]]] = None,
+    cpu_threads: Optional[int] = None,
+    max_bitrate: Optional[int] = None,
+    cancel_event: Optional[threading.Event] = None
 ) -> Tuple[int, int, int]:
     """Process files sequentially, one at a time.
     Uses GPU acceleration if gpu_encoder is provided.
@@ -866,6 +1434,13 @@ def process_files_sequential(
         add_timestamp: Whether to add timestamp
         custom_suffix: Custom suffix to add
         progress_callback: Function to call with progress updates (current, total)
+        file_progress_callback: Function to call with per-file progress (filename, status, percent)
+        is_paused: Callable returning True while processing should pause (optional)
+        status_callback: Function to call with status messages (optional)
+        ordered_encoders: Encoders to try in order, from resolve_encoder_order (optional)
+        cpu_threads: Threads per ffmpeg process for CPU encoding (optional)
+        max_bitrate: Maximum video bitrate in Mbps (optional)
+        cancel_event: Event that stops the batch when set; remaining files are not started (optional)
         
     Returns:
         Tuple[int, int, int]: (ok, fail, skipped)
@@ -875,26 +1450,46 @@ def process_files_sequential(
     skipped = 0
     total_files = len(files)
     
+    # 编码器尝试顺序对所有文件相同，只计算一次
+    if gpu_encoder and ordered_encoders is None:
+        ordered_encoders = resolve_encoder_order(ffmpeg, gpu_encoder, codec)
+    
+    # 一次性扫描输出目录中已存在的文件
+    existing_outputs = scan_existing_outputs(output_dir)
+    
+    # 输出文件命名规则对整批文件相同，只构建一次
+    name_fn = make_output_namer(
+        keep_original_name, custom_filename, custom_filename_text, add_timestamp, custom_suffix, total_files
+    )
+    
+    # 可以在进入 process_file 之前判断是否跳过已存在的输出文件
+    precheck_skip = existing_outputs is not None and skip_existing and not overwrite
+    
     # Process files one by one
     for i, in_file in enumerate(files):
-        # 如果使用自定义文件名且处理多个文件，为每个文件添加序号
-        current_custom_filename_text = custom_filename_text
-        if custom_filename and len(files) > 1:
-            # 为多个文件添加序号（从1开始）
-            base_custom_name = custom_filename_text.strip()
-            if base_custom_name.endswith('.mp4'):
-                base_custom_name = base_custom_name[:-4]
-            current_custom_filename_text = f"{base_custom_name}_{i+1:04d}"
-        
-        # 发送文件开始处理信号
-        if file_progress_callback:
-            file_progress_callback(in_file.name, '处理中', 0)
+        if cancel_event is not None and cancel_event.is_set():
+            break
         
-        result = process_file(
-            in_file, output_dir, ffmpeg, crf, preset, fps, audio_bitrate, 
-            overwrite, skip_existing, dry_run, None, test_mode, gpu_encoder, codec,
-            keep_original_name, custom_filename, current_custom_filename_text, add_timestamp, custom_suffix
-        )
+        out_name = None
+        if precheck_skip:
+            out_name = name_fn(in_file, i, time.strftime('%Y%m%d_%H%M%S'))
+        
+        if out_name is not None and os.path.normcase(out_name) in existing_outputs:
+            # 输出已存在，直接跳过
+            result = (True, f"SKIP (exists): {out_name}")
+        else:
+            # 发送文件开始处理信号
+            if file_progress_callback:
+                file_progress_callback(in_file.name, '处理中', 0)
+            
+            result = process_file(
+                in_file, output_dir, ffmpeg, crf, preset, fps, audio_bitrate, 
+                overwrite, skip_existing, dry_run, None, test_mode, gpu_encoder, codec,
+                is_paused=is_paused, status_callback=status_callback, ordered_encoders=ordered_encoders,
+                existing_outputs=existing_outputs, cpu_threads=cpu_threads, name_fn=name_fn, index=i,
+                file_progress_callback=file_progress_callback, max_bitrate=max_bitrate,
+                cancel_event=cancel_event
+            )
         
         success, message = result
         print(message)
@@ -936,7 +1531,15 @@ def process_files_parallel(
     custom_filename: bool = False,
     custom_filename_text: str = '',
     add_timestamp: bool = False,
-    custom_suffix: str = '_hlg_phone'
+    custom_suffix: str = '_hlg_phone',
+    progress_callback: Optional[callable] = None,
+    file_progress_callback: Optional[callable] = None,
+    is_paused: Optional[callable] = None,
+    status_callback: Optional[callable] = None,
+    ordered_encoders: Optional[List[Optional[str]]] = None,
+    cpu_threads: Optional[int] = None,
+    max_bitrate: Optional[int] = None,
+    cancel_event: Optional[threading.Event] = None
 ) -> Tuple[int, int, int]:
     """Process files in parallel with thread pool.
     Uses GPU acceleration if gpu_encoder is provided.
@@ -960,6 +1563,14 @@ def process_files_parallel(
         custom_filename_text: Custom filename text
         add_timestamp: Whether to add timestamp
         custom_suffix: Custom suffix to add
+        progress_callback: Function to call with progress updates (current, total)
+        file_progress_callback: Function to call with per-file progress (filename, status, percent)
+        is_paused: Callable returning True while processing should pause (optional)
+        status_callback: Function to call with status messages (optional)
+        ordered_encoders: Encoders to try in order, from resolve_encoder_order (optional)
+        cpu_threads: Threads per ffmpeg process for CPU encoding (optional)
+        max_bitrate: Maximum video bitrate in Mbps (optional)
+        cancel_event: Event that stops the batch when set; queued files are not started (optional)
         
     Returns:
         Tuple[int, int, int]: (ok, fail, skipped)
@@ -967,53 +1578,146 @@ def process_files_parallel(
     ok = 0
     fail = 0
     skipped = 0
+    done = 0
+    total_files = len(files)
     
-    # Use thread-safe counters
-    counters = threading.Lock()
+    # 编码器尝试顺序对所有文件相同，只计算一次
+    if gpu_encoder and ordered_encoders is None:
+        ordered_encoders = resolve_encoder_order(ffmpeg, gpu_encoder, codec)
     
-    def update_counters(result: Tuple[bool, str]):
-        nonlocal ok, fail, skipped
+    # 一次性扫描输出目录中已存在的文件
+    existing_outputs = scan_existing_outputs(output_dir)
+    
+    def update_counters(in_file: Path, result: Tuple[bool, str]):
+        nonlocal ok, fail, skipped, done
         success, message = result
-        with counters:
-            print(message)
-            if "SKIP" in message:
-                skipped += 1
-            elif success:
-                ok += 1
-            else:
-                fail += 1
+        print(message)
+        if "SKIP" in message:
+            status = '跳过'
+            skipped += 1
+        elif success:
+            status = '完成'
+            ok += 1
+        else:
+            status = '失败'
+            fail += 1
+        done += 1
+        if file_progress_callback:
+            file_progress_callback(in_file.name, status, 100)
+        if progress_callback:
+            progress_callback(done, total_files)
+    
+    # 输出文件命名规则对整批文件相同，只构建一次
+    name_fn = make_output_namer(
+        keep_original_name, custom_filename, custom_filename_text, add_timestamp, custom_suffix, total_files
+    )
+    
+    # 除文件名外的参数对所有任务相同，预先绑定
+    task = partial(
+        process_file,
+        output_dir=output_dir, ffmpeg=ffmpeg, crf=crf, preset=preset, fps=fps,
+        audio_bitrate=audio_bitrate, overwrite=overwrite, skip_existing=skip_existing,
+        dry_run=dry_run, progress=None, test_mode=test_mode, gpu_encoder=gpu_encoder, codec=codec,
+        name_fn=name_fn, file_progress_callback=file_progress_callback, is_paused=is_paused, status_callback=status_callback, ordered_encoders=ordered_encoders,
+        existing_outputs=existing_outputs, cpu_threads=cpu_threads, max_bitrate=max_bitrate,
+        cancel_event=cancel_event
+    )
+    
+    # 多块NVIDIA显卡时，将NVENC编码任务分配到空闲的显卡上（默认全部发送到第一块显卡）
+    free_gpus = None
+    if gpu_encoder in NVENC_ENCODERS:
+        gpu_count = get_nvidia_gpu_count()
+        if gpu_count > 1:
+            free_gpus = queue.Queue()
+            for gpu_index in range(gpu_count):
+                free_gpus.put(gpu_index)
+    
+    def worker(in_file: Path, index: int, duration: Optional[float], cpu: bool = False) -> Tuple[bool, str]:
+        if cancel_event is not None and cancel_event.is_set():
+            # 已取消：尚未开始的文件不再处理
+            return (False, f"CANCELLED: {in_file.name}")
+        
+        if file_progress_callback:
+            file_progress_callback(in_file.name, '处理中', 0)
+        
+        if cpu:
+            # GPU编码全部失败后转入CPU线程池的文件
+            return cpu_task(in_file, index=index, duration=duration)
+        
+        if free_gpus is None:
+            return task(in_file, index=index, duration=duration)
+        
+        # 占用一块空闲显卡，完成后归还，使各显卡的编码任务保持均衡
+        gpu_index = free_gpus.get()
+        try:
+            return task(in_file, index=index, duration=duration, gpu_index=gpu_index)
+        finally:
+            free_gpus.put(gpu_index)
     
-    # Create thread pool
-    threads = []
+    # 可以在提交任务之前判断是否跳过已存在的输出文件
+    precheck_skip = existing_outputs is not None and skip_existing and not overwrite
     
-    # Process files with thread limit
+    # 待处理的文件（保留原始序号，用于自定义文件名编号）
+    pending = []
     for i, in_file in enumerate(files):
-        # Wait if we've reached max threads
-        if len(threads) >= max_threads:
-            # Wait for any thread to complete
-            for thread in threads:
-                if not thread.is_alive():
-                    thread.join()
-                    threads.remove(thread)
-                    break
-        
-        # Start new thread
-        thread = threading.Thread(
-                target=lambda f: update_counters(process_file(
-                    f, output_dir, ffmpeg, crf, preset, fps, audio_bitrate, overwrite, skip_existing, dry_run, None, test_mode, gpu_encoder, codec,
-                    keep_original_name, custom_filename, custom_filename_text, add_timestamp, custom_suffix
-                )),
-                args=(in_file,)
-            )
-        thread.start()
-        threads.append(thread)
+        if precheck_skip:
+            out_name = name_fn(in_file, i, time.strftime('%Y%m%d_%H%M%S'))
+            if os.path.normcase(out_name) in existing_outputs:
+                # 输出已存在，直接计入跳过，不占用线程池
+                update_counters(in_file, (True, f"SKIP (exists): {out_name}"))
+                continue
+        pending.append((i, in_file))
+    
+    # 预先并行读取所有文件的时长：用于单个文件进度，并按时长从长到短调度（LPT），
+    # 避免最长的文件最后才开始，导致批次末尾只有一个ffmpeg在运行
+    durations = {}
+    if len(pending) > 1 and not (dry_run or test_mode):
+        durations = probe_durations(ffmpeg, [in_file for _, in_file in pending])
+        pending.sort(key=lambda item: durations.get(item[1]) or 0, reverse=True)
+    
+    # GPU编码时，所有GPU编码器都失败的文件转入单独的CPU线程池编码，
+    # 避免耗时的CPU编码占用GPU编码的并发名额
+    cpu_executor = None
+    if gpu_encoder:
+        task = partial(task, cpu_fallback=False)
+        cpu_jobs = get_max_concurrent_jobs(None, max_threads)
+        cpu_task = partial(
+            task, gpu_encoder=None, cpu_threads=cpu_threads or get_cpu_threads_per_job(cpu_jobs),
+            existing_outputs=None, skip_existing=False
+        )
+        cpu_executor = ThreadPoolExecutor(max_workers=cpu_jobs)
     
-    # Wait for all threads to complete
-    for thread in threads:
-        thread.join()
+    # 线程池始终保持 max_threads 个ffmpeg进程在运行；结果在当前线程中按完成顺序汇总，无需加锁
+    with ThreadPoolExecutor(max_workers=max(1, max_threads)) as executor:
+        futures = {
+            executor.submit(worker, in_file, i, durations.get(in_file)): (i, in_file)
+            for i, in_file in pending
+        }
+        try:
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i, in_file = futures.pop(future)
+                    result = future.result()
+                    if result[1].startswith(CPU_FALLBACK_PENDING):
+                        if status_callback:
+                            status_callback(f"所有GPU编码器失败，切换到CPU编码: {in_file.name}")
+                        futures[cpu_executor.submit(worker, in_file, i, durations.get(in_file), True)] = (i, in_file)
+                    else:
+                        update_counters(in_file, result)
+        finally:
+            if cpu_executor is not None:
+                cpu_executor.shutdown()
     
     return ok, fail, skipped
 
+# 单个文件进度信号的最小发送间隔（秒），避免大量信号挤占GUI事件循环
+PROGRESS_EMIT_INTERVAL = 0.1
+
+# 取消/停止时等待工作线程退出的最长时间（毫秒），避免GUI线程无限阻塞
+WORKER_CANCEL_TIMEOUT_MS = 5000
+
+
 class TranscodeWorker(QThread):
     """Worker thread for video transcoding."""
     progress_updated = pyqtSignal(int)
@@ -1027,6 +1731,40 @@ class TranscodeWorker(QThread):
         self.output_dir = output_dir
         self.params = params
         self.is_paused = False  # Flag to control pausing
+        # 设置后停止转码：终止正在运行的ffmpeg，不再开始新的文件（见 cancel()）
+        self.cancel_event = threading.Event()
+        # 信号节流状态（并行处理时会从多个线程调用）
+        self._throttle_lock = threading.Lock()
+        self._last_progress_percent = None
+        self._file_progress_emitted = {}  # filename -> (发送时间, 进度)
+    
+    def cancel(self):
+        """请求停止转码（线程安全）。正在运行的ffmpeg会被终止，调用方随后 wait() 等待线程结束。"""
+        self.cancel_event.set()
+    
+    def _emit_progress(self, current, total):
+        """发送总体进度信号；百分比未变化时不重复发送。"""
+        percent = int(100 * current / total)
+        with self._throttle_lock:
+            if percent == self._last_progress_percent:
+                return
+            self._last_progress_percent = percent
+        self.progress_updated.emit(percent)
+    
+    def _emit_file_progress(self, filename, status, progress):
+        """发送单个文件进度信号。
+        
+        状态变化（开始、完成、失败、跳过）总是发送；处理中的中间进度限制为每个文件
+        每 PROGRESS_EMIT_INTERVAL 秒最多一次，且相同进度不重复发送。
+        """
+        if status == '处理中' and 0 < progress < 100:
+            now = time.monotonic()
+            with self._throttle_lock:
+                last = self._file_progress_emitted.get(filename)
+                if last is not None and (progress == last[1] or now - last[0] < PROGRESS_EMIT_INTERVAL):
+                    return
+                self._file_progress_emitted[filename] = (now, progress)
+        self.file_progress_updated.emit(filename, status, progress)
     
     def run(self):
         """Execute transcoding process."""
@@ -1084,7 +1822,9 @@ class TranscodeWorker(QThread):
             # Process parameters
             fps = None if self.params['keep_fps'] else self.params['fps']
             
-            # Collect files to process
+            # Collect files to process（在工作线程中扫描，不阻塞界面；大目录扫描前先提示）
+            if input_path.is_dir():
+                self.status_updated.emit(f"正在扫描视频文件: {input_path}")
             files = list(iter_video_files(input_path, self.params['recursive']))
             if not files:
                 error_msg = (
@@ -1101,7 +1841,7 @@ class TranscodeWorker(QThread):
             self.status_updated.emit(f"找到 {len(files)} 个视频文件")
             
             # 显示编码信息
-            codec_display = 'H.265 (HEVC)' if self.params['codec'] == 'hevc' else 'H.264 (AVC)'
+            codec_display = CODEC_DISPLAY[self.params['codec']]
             self.status_updated.emit(f"编码格式: {codec_display}")
             
             # Process files
@@ -1116,35 +1856,11 @@ class TranscodeWorker(QThread):
             if self.params['enable_gpu']:
                 if gpu_encoder:
                     # 获取GPU信息
-                    gpu_brand, gpu_model, gpu_type = get_gpu_info_standalone()
-                    
-                    # 编码器名称映射
-                    encoder_name_map = {
-                        'h265_nvenc': 'h265_nvenc',
-                        'hevc_amf': 'hevc_amf',
-                        'hevc_qsv': 'hevc_qsv',
-                        'hevc_videotoolbox': 'hevc_videotoolbox',
-                        'h264_nvenc': 'h264_nvenc',
-                        'h264_amf': 'h264_amf',
-                        'h264_qsv': 'h264_qsv',
-                        'h264_videotoolbox': 'h264_videotoolbox'
-                    }
-                    encoder_name = encoder_name_map.get(gpu_encoder, gpu_encoder)
+                    gpu_info_str = format_gpu_info(*get_gpu_info_standalone())
                     
-                    # 构建GPU信息字符串
-                    gpu_info_parts = []
-                    if gpu_brand:
-                        gpu_info_parts.append(f"品牌: {gpu_brand}")
-                    if gpu_model:
-                        gpu_info_parts.append(f"型号: {gpu_model}")
-                    if gpu_type:
-                        gpu_type_display = "独显" if gpu_type == 'dedicated' else "核显"
-                        gpu_info_parts.append(f"类型: {gpu_type_display}")
-                    gpu_info_str = f" ({', '.join(gpu_info_parts)})" if gpu_info_parts else ""
-                    
-                    self.status_updated.emit(f"编码器: {encoder_name} (GPU加速)")
-                    if gpu_info_parts:
-                        self.status_updated.emit(f"GPU信息{gpu_info_str}")
+                    self.status_updated.emit(f"编码器: {gpu_encoder} (GPU加速)")
+                    if gpu_info_str:
+                        self.status_updated.emit(f"GPU信息 ({gpu_info_str})")
                 else:
                     # 使用CPU编码
                     cpu_encoder = 'libx265' if self.params['codec'] == 'hevc' else 'libx264'
@@ -1163,7 +1879,30 @@ class TranscodeWorker(QThread):
             add_timestamp = self.params.get('add_timestamp', False)
             custom_suffix = self.params.get('custom_suffix', '_hlg_phone')
             
-            ok, fail, skipped = process_files_sequential(
+            # 编码器尝试顺序（含回退）在本次运行中只计算一次
+            ordered_encoders = resolve_encoder_order(ffmpeg, gpu_encoder, self.params['codec']) if gpu_encoder else None
+            
+            # 根据编码器的硬件并发能力决定同时转码的文件数量
+            max_jobs = get_max_concurrent_jobs(gpu_encoder, self.params.get('threads', 1))
+            if max_jobs > 1 and len(files) > 1:
+                self.status_updated.emit(f"并行处理: 同时转码 {max_jobs} 个文件")
+                process_files = process_files_parallel
+                extra_args = {'max_threads': max_jobs}
+            else:
+                max_jobs = 1
+                process_files = process_files_sequential
+                extra_args = {}
+            # CPU编码（含GPU编码失败后的CPU回退）使用用户指定的每进程线程数；
+            # 未指定（自动）时多个ffmpeg进程平分CPU核心
+            cpu_threads = self.params.get('ffmpeg_threads')
+            if not cpu_threads and not gpu_encoder:
+                cpu_threads = get_cpu_threads_per_job(max_jobs)
+            if cpu_threads:
+                if not gpu_encoder:
+                    self.status_updated.emit(f"每个ffmpeg线程数: {cpu_threads}")
+                extra_args['cpu_threads'] = cpu_threads
+            
+            ok, fail, skipped = process_files(
                 files=files,
                 output_dir=output_dir,
                 ffmpeg=ffmpeg,
@@ -1182,10 +1921,19 @@ class TranscodeWorker(QThread):
                 custom_filename_text=custom_filename_text,
                 add_timestamp=add_timestamp,
                 custom_suffix=custom_suffix,
-                progress_callback=lambda current, total: self.progress_updated.emit(int(100 * current / total)),
-                file_progress_callback=lambda filename, status, progress: self.file_progress_updated.emit(filename, status, progress)
+                progress_callback=self._emit_progress,
+                file_progress_callback=self._emit_file_progress,
+                is_paused=lambda: self.is_paused,
+                status_callback=self.status_updated.emit,
+                ordered_encoders=ordered_encoders,
+                max_bitrate=self.params.get('max_bitrate') or None,
+                cancel_event=self.cancel_event,
+                **extra_args
             )
             
+            if self.cancel_event.is_set():
+                # 已取消：由发起取消的一方更新界面，不发送完成信号
+                return
             self.finished.emit(ok, fail, skipped)
             
         except Exception as e:
@@ -1202,6 +1950,104 @@ class TranscodeWorker(QThread):
             self.finished.emit(0, 1, 0)
 
 
+# 配置保存的防抖延迟（毫秒）
+CONFIG_SAVE_DELAY_MS = 500
+
+# 转码设置中 ComboBox 的样式（白色背景，黑色文字）
+COMBO_BOX_STYLE = """
+QComboBox {
+    background-color: white;
+    color: black;
+    border: 1px solid #ccc;
+    padding: 2px;
+}
+QComboBox:hover {
+    border: 1px solid #999;
+}
+QComboBox::drop-down {
+    border: none;
+    background-color: white;
+}
+QComboBox::down-arrow {
+    image: none;
+    border-left: 4px solid transparent;
+    border-right: 4px solid transparent;
+    border-top: 6px solid black;
+    margin-right: 5px;
+}
+QComboBox QAbstractItemView {
+    background-color: white;
+    color: black;
+    selection-background-color: #0078d4;
+    selection-color: white;
+    border: 1px solid #ccc;
+}
+"""
+
+# 进度详情的刷新间隔（毫秒），期间的多次进度更新合并为一次重绘
+PROGRESS_REFRESH_MS = 200
+
+# 日志的刷新间隔（毫秒），期间的多条日志一次性写入日志框
+LOG_FLUSH_MS = 100
+
+# 进度详情中各状态的图标
+FILE_STATUS_ICONS = {
+    '处理中': '⏳',
+    '完成': '✅',
+    '失败': '❌',
+    '跳过': '⏭️',
+    '等待': '⏸️'
+}
+
+# 配置项与界面控件的对应关系：(配置键, 控件属性名, 控件类型)
+# apply_config 和 save_config 都遍历此表，新增配置项只需在这里添加一行
+CONFIG_SCHEMA = (
+    ('input_path', 'input_path_edit', 'text'),
+    ('output_path', 'output_path_edit', 'text'),
+    ('recursive', 'recursive_check', 'check'),
+    ('overwrite', 'overwrite_check', 'check'),
+    ('skip_existing', 'skip_existing_check', 'check'),
+    ('keep_original_name', 'keep_original_name_check', 'check'),
+    ('custom_filename', 'custom_filename_check', 'check'),
+    ('custom_filename_text', 'custom_filename_edit', 'text'),
+    ('add_timestamp', 'add_timestamp_check', 'check'),
+    ('custom_suffix', 'custom_suffix_edit', 'text'),
+    ('codec', 'codec_combo', 'combo'),
+    ('crf', 'crf_spin', 'spin'),
+    ('max_bitrate', 'max_bitrate_spin', 'spin'),
+    ('preset', 'preset_combo', 'combo'),
+    ('fps', 'fps_spin', 'spin'),
+    ('keep_fps', 'keep_fps_check', 'check'),
+    ('audio_bitrate', 'audio_bitrate_combo', 'combo'),
+    ('enable_gpu', 'enable_gpu_check', 'check'),
+    ('threads', 'threads_spin', 'spin'),
+    ('ffmpeg_threads', 'ffmpeg_threads_spin', 'spin'),
+    ('dry_run', 'dry_run_check', 'check'),
+)
+
+
+def _set_combo_text(combo, text):
+    """选中下拉框中与 text 相同的项（不存在时保持不变）。"""
+    index = combo.findText(text)
+    if index >= 0:
+        combo.setCurrentIndex(index)
+
+
+# 各控件类型读取/设置配置值的方法
+CONFIG_GETTERS = {
+    'text': lambda widget: widget.text(),
+    'check': lambda widget: widget.isChecked(),
+    'combo': lambda widget: widget.currentText(),
+    'spin': lambda widget: widget.value(),
+}
+CONFIG_SETTERS = {
+    'text': lambda widget, value: widget.setText(value),
+    'check': lambda widget, value: widget.setChecked(value),
+    'combo': _set_combo_text,
+    'spin': lambda widget, value: widget.setValue(value),
+}
+
+
 class NoWheelSpinBox(QSpinBox):
     """自定义 QSpinBox，禁用鼠标滚轮改变数值。"""
     
@@ -1218,8 +2064,43 @@ class NoWheelComboBox(QComboBox):
         event.ignore()
 
 
+@contextmanager
+def batched_table_update(table):
+    """暂停表格的重绘和信号，批量修改完成后只重新布局和绘制一次。"""
+    table.setUpdatesEnabled(False)
+    table.blockSignals(True)
+    try:
+        yield table
+    finally:
+        table.blockSignals(False)
+        table.setUpdatesEnabled(True)
+
+
+class RemoveButtonDelegate(QStyledItemDelegate):
+    """任务表“操作”列的委托：绘制“移除”按钮并处理点击，无需为每一行创建按钮控件。"""
+    remove_requested = pyqtSignal(int)  # row
+    
+    def paint(self, painter, option, index):
+        """以按钮样式绘制单元格。"""
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = "移除"
+        button.state = option.state & QStyle.State_Enabled
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+    
+    def editorEvent(self, event, model, option, index):
+        """在单元格内松开鼠标左键时请求移除该行。"""
+        if (event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton
+                and option.rect.contains(event.pos())):
+            self.remove_requested.emit(index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
+
+
 class SonyToPhotoGUI(QMainWindow):
     """Main GUI window."""
+    gpu_usage_updated = pyqtSignal(str)  # GPU使用率（由后台查询线程发送）
     
     def __init__(self):
         super().__init__()
@@ -1233,11 +2114,20 @@ class SonyToPhotoGUI(QMainWindow):
         # 标志：是否正在加载配置（加载期间不保存配置）
         self.is_loading_config = True
         
+        # 配置保存防抖：控件连续变化（如输入文件名）时只在停止变化后写入一次
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.timeout.connect(self._do_save_config)
+        
         # 背景图片 QLabel（将在 init_ui 中创建）
         self.background_label = None
+        # 已处理的背景图片缓存：((修改时间, 透明度), QPixmap)
+        self._bg_cache = None
         
         self.init_ui()
         self.worker = None
+        # 取消后未能在超时内退出的工作线程，保留引用直到其结束，避免运行中被回收
+        self.stopping_workers = []
         
         # Task queue variables
         self.task_queue = []  # List of tasks with params
@@ -1258,10 +2148,32 @@ class SonyToPhotoGUI(QMainWindow):
                 # 确保配置文件所在目录存在
                 self.config_file.parent.mkdir(parents=True, exist_ok=True)
                 # 创建默认配置文件（空配置）
-                self.save_config()
+                self._do_save_config()
                 print(f"已创建默认配置文件: {self.config_file}")
             except Exception as e:
                 print(f"创建默认配置文件失败: {e}")
+        
+        # 默认GPU编码器缓存（codec -> 编码器），“重新检测GPU”时清空
+        self._default_gpu_encoders = {}
+        
+        # 已读取的帮助/关于文档（文件名 -> (修改时间, HTML)）
+        self._html_cache = {}
+        # 使用说明对话框（首次打开时创建，之后重复使用）
+        self._help_dialog = None
+        
+        # 在后台线程中预先完成GPU和编码器检测，首次点击转码时无需等待
+        threading.Thread(target=self._warm_gpu_detection, daemon=True).start()
+    
+    def _warm_gpu_detection(self):
+        """预先执行GPU信息和GPU编码器检测（结果由各检测函数缓存）。"""
+        try:
+            get_gpu_info_standalone()
+            ffmpeg_path = which_ffmpeg()
+            for codec in ('hevc', 'h264'):
+                detect_gpu_encoders(str(ffmpeg_path), codec)
+        except Exception:
+            # 检测失败时在实际使用时再报告
+            pass
     
     def load_config(self):
         """加载配置文件。
@@ -1271,14 +2183,19 @@ class SonyToPhotoGUI(QMainWindow):
         """
         try:
             if self.config_file.exists():
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    return config
+                return read_json_file(self.config_file)
         except Exception as e:
             print(f"加载配置文件失败: {e}")
         return {}
     
     def save_config(self):
+        """请求保存配置：在 CONFIG_SAVE_DELAY_MS 毫秒内没有新的变化时才实际写入文件。"""
+        # 如果正在加载配置，不保存
+        if self.is_loading_config:
+            return
+        self._save_timer.start(CONFIG_SAVE_DELAY_MS)
+    
+    def _do_save_config(self):
         """保存当前配置到文件。"""
         # 如果正在加载配置，不保存
         if self.is_loading_config:
@@ -1289,32 +2206,15 @@ class SonyToPhotoGUI(QMainWindow):
             self.config_file.parent.mkdir(parents=True, exist_ok=True)
             
             config = {
-                'input_path': self.input_path_edit.text(),
-                'output_path': self.output_path_edit.text(),
-                'recursive': self.recursive_check.isChecked(),
-                'overwrite': self.overwrite_check.isChecked(),
-                'skip_existing': self.skip_existing_check.isChecked(),
-                'keep_original_name': self.keep_original_name_check.isChecked(),
-                'custom_filename': self.custom_filename_check.isChecked(),
-                'custom_filename_text': self.custom_filename_edit.text(),
-                'add_timestamp': self.add_timestamp_check.isChecked(),
-                'custom_suffix': self.custom_suffix_edit.text(),
-                'codec': self.codec_combo.currentText(),
-                'crf': self.crf_spin.value(),
-                'preset': self.preset_combo.currentText(),
-                'fps': self.fps_spin.value(),
-                'keep_fps': self.keep_fps_check.isChecked(),
-                'audio_bitrate': self.audio_bitrate_combo.currentText(),
-                'enable_gpu': self.enable_gpu_check.isChecked(),
-                'threads': self.threads_spin.value(),
-                'dry_run': self.dry_run_check.isChecked(),
-                # 保存上次使用的GPU编码器（按codec分别保存）
-                'last_gpu_encoder_hevc': getattr(self, '_last_gpu_encoder_hevc', None),
-                'last_gpu_encoder_h264': getattr(self, '_last_gpu_encoder_h264', None),
+                key: CONFIG_GETTERS[kind](getattr(self, widget_name))
+                for key, widget_name, kind in CONFIG_SCHEMA
             }
+            # 保存上次使用的GPU编码器（按codec分别保存）；本次运行未成功使用过时保留原记录
+            for codec in ('hevc', 'h264'):
+                key = f'last_gpu_encoder_{codec}'
+                config[key] = _last_saved_gpu_encoders.get(codec) or self.config.get(key)
             
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
+            write_json_file(self.config_file, config)
         except Exception as e:
             print(f"保存配置文件失败: {e}")
     
@@ -1324,84 +2224,14 @@ class SonyToPhotoGUI(QMainWindow):
             return
         
         try:
-            # 输入路径
-            if 'input_path' in self.config:
-                self.input_path_edit.setText(self.config.get('input_path', ''))
-            
-            # 输出路径
-            if 'output_path' in self.config:
-                self.output_path_edit.setText(self.config.get('output_path', ''))
-            
-            # 复选框
-            if 'recursive' in self.config:
-                self.recursive_check.setChecked(self.config.get('recursive', False))
-            if 'overwrite' in self.config:
-                self.overwrite_check.setChecked(self.config.get('overwrite', False))
-            if 'skip_existing' in self.config:
-                self.skip_existing_check.setChecked(self.config.get('skip_existing', True))
-            if 'keep_original_name' in self.config:
-                keep_orig = self.config.get('keep_original_name', True)
-                self.keep_original_name_check.setChecked(keep_orig)
-                # 如果保留原始文件名被勾选，确保自定义文件名未勾选
-                if keep_orig:
-                    self.custom_filename_check.setChecked(False)
-                    self.custom_filename_edit.setEnabled(False)
-            if 'custom_filename' in self.config:
-                custom_fn = self.config.get('custom_filename', False)
-                self.custom_filename_check.setChecked(custom_fn)
-                # 如果自定义文件名被勾选，确保保留原始文件名未勾选
-                if custom_fn:
-                    self.keep_original_name_check.setChecked(False)
-                    self.custom_filename_edit.setEnabled(True)
-                else:
-                    self.custom_filename_edit.setEnabled(False)
-            if 'custom_filename_text' in self.config:
-                self.custom_filename_edit.setText(self.config.get('custom_filename_text', ''))
+            for key, widget_name, kind in CONFIG_SCHEMA:
+                if key in self.config:
+                    CONFIG_SETTERS[kind](getattr(self, widget_name), self.config[key])
             
-            # 确保至少有一个被勾选（如果两个都未勾选，默认勾选保留原始文件名）
+            # 保留原始文件名与自定义文件名互斥（由复选框信号处理），且至少有一个被勾选
             if not self.keep_original_name_check.isChecked() and not self.custom_filename_check.isChecked():
                 self.keep_original_name_check.setChecked(True)
-                self.custom_filename_edit.setEnabled(False)
-            
-            if 'add_timestamp' in self.config:
-                self.add_timestamp_check.setChecked(self.config.get('add_timestamp', False))
-            if 'keep_fps' in self.config:
-                self.keep_fps_check.setChecked(self.config.get('keep_fps', False))
-            if 'enable_gpu' in self.config:
-                self.enable_gpu_check.setChecked(self.config.get('enable_gpu', True))
-            if 'dry_run' in self.config:
-                self.dry_run_check.setChecked(self.config.get('dry_run', False))
-            
-            # 文本输入
-            if 'custom_suffix' in self.config:
-                self.custom_suffix_edit.setText(self.config.get('custom_suffix', '_hlg_phone'))
-            
-            # 下拉框
-            if 'codec' in self.config:
-                codec_text = self.config.get('codec', 'H.265 (HEVC)')
-                index = self.codec_combo.findText(codec_text)
-                if index >= 0:
-                    self.codec_combo.setCurrentIndex(index)
-            
-            if 'preset' in self.config:
-                preset_text = self.config.get('preset', 'medium')
-                index = self.preset_combo.findText(preset_text)
-                if index >= 0:
-                    self.preset_combo.setCurrentIndex(index)
-            
-            if 'audio_bitrate' in self.config:
-                bitrate_text = self.config.get('audio_bitrate', '192k')
-                index = self.audio_bitrate_combo.findText(bitrate_text)
-                if index >= 0:
-                    self.audio_bitrate_combo.setCurrentIndex(index)
-            
-            # 数值输入
-            if 'crf' in self.config:
-                self.crf_spin.setValue(self.config.get('crf', 18))
-            if 'fps' in self.config:
-                self.fps_spin.setValue(self.config.get('fps', 60))
-            if 'threads' in self.config:
-                self.threads_spin.setValue(self.config.get('threads', 4))
+            self.custom_filename_edit.setEnabled(self.custom_filename_check.isChecked())
         except Exception as e:
             print(f"应用配置失败: {e}")
     
@@ -1414,14 +2244,13 @@ class SonyToPhotoGUI(QMainWindow):
         try:
             bg_config_file = get_app_directory() / "background_config.json"
             if bg_config_file.exists():
-                with open(bg_config_file, 'r', encoding='utf-8') as f:
-                    bg_config = json.load(f)
-                    opacity_percent = bg_config.get('opacity', 95)
-                    # 确保透明度百分比在有效范围内（0-100）
-                    opacity_percent = max(0, min(100, int(opacity_percent)))
-                    # 转换为 0.0-1.0 的小数形式（setWindowOpacity 需要）
-                    opacity = opacity_percent / 100.0
-                    return opacity
+                bg_config = read_json_file(bg_config_file)
+                opacity_percent = bg_config.get('opacity', 95)
+                # 确保透明度百分比在有效范围内（0-100）
+                opacity_percent = max(0, min(100, int(opacity_percent)))
+                # 转换为 0.0-1.0 的小数形式（setWindowOpacity 需要）
+                opacity = opacity_percent / 100.0
+                return opacity
         except Exception as e:
             print(f"加载背景配置失败: {e}")
         return 0.95  # 默认透明度（对应 95%）
@@ -1435,22 +2264,39 @@ class SonyToPhotoGUI(QMainWindow):
             app_dir = get_app_directory()
             background_image = app_dir / "background.png"
             
-            if background_image.exists():
+            try:
+                mtime = background_image.stat().st_mtime
+            except OSError:
+                mtime = None
+            
+            if mtime is not None:
                 # 加载背景配置获取透明度
                 opacity = self.load_background_config()
                 
+                # 图片和透明度都未变化时直接复用已处理的图片
+                cache_key = (mtime, opacity)
+                if self._bg_cache is not None and self._bg_cache[0] == cache_key:
+                    self.background_label.setPixmap(self._bg_cache[1])
+                    self.background_label.show()
+                    return
+                
                 # 加载图片
                 pixmap = QPixmap(str(background_image))
                 if not pixmap.isNull():
-                    # 设置图片透明度
-                    # 创建一个临时图片，应用透明度
-                    transparent_pixmap = QPixmap(pixmap.size())
-                    transparent_pixmap.fill(Qt.transparent)
-                    
-                    painter = QPainter(transparent_pixmap)
-                    painter.setOpacity(opacity)
-                    painter.drawPixmap(0, 0, pixmap)
-                    painter.end()
+                    if opacity < 1.0:
+                        # 设置图片透明度
+                        # 创建一个临时图片，应用透明度
+                        transparent_pixmap = QPixmap(pixmap.size())
+                        transparent_pixmap.fill(Qt.transparent)
+                        
+                        painter = QPainter(transparent_pixmap)
+                        painter.setOpacity(opacity)
+                        painter.drawPixmap(0, 0, pixmap)
+                        painter.end()
+                    else:
+                        # 不透明时无需重新绘制
+                        transparent_pixmap = pixmap
+                    self._bg_cache = (cache_key, transparent_pixmap)
                     
                     # 设置 QLabel 的背景图片
                     self.background_label.setPixmap(transparent_pixmap)
@@ -1470,47 +2316,6 @@ class SonyToPhotoGUI(QMainWindow):
         except Exception as e:
             print(f"应用背景图片失败: {e}")
     
-    def set_combo_box_styles(self):
-        """设置所有 ComboBox 的样式（白色背景，黑色文字）。"""
-        combo_style = """
-        QComboBox {
-            background-color: white;
-            color: black;
-            border: 1px solid #ccc;
-            padding: 2px;
-        }
-        QComboBox:hover {
-            border: 1px solid #999;
-        }
-        QComboBox::drop-down {
-            border: none;
-            background-color: white;
-        }
-        QComboBox::down-arrow {
-            image: none;
-            border-left: 4px solid transparent;
-            border-right: 4px solid transparent;
-            border-top: 6px solid black;
-            margin-right: 5px;
-        }
-        QComboBox QAbstractItemView {
-            background-color: white;
-            color: black;
-            selection-background-color: #0078d4;
-            selection-color: white;
-            border: 1px solid #ccc;
-        }
-        """
-        # 应用样式到所有 ComboBox
-        if hasattr(self, 'codec_combo'):
-            self.codec_combo.setStyleSheet(combo_style)
-        if hasattr(self, 'preset_combo'):
-            self.preset_combo.setStyleSheet(combo_style)
-        if hasattr(self, 'audio_bitrate_combo'):
-            self.audio_bitrate_combo.setStyleSheet(combo_style)
-        if hasattr(self, 'gpu_combo'):
-            self.gpu_combo.setStyleSheet(combo_style)
-    
     def resizeEvent(self, event):
         """窗口大小改变时，调整背景 QLabel 的大小。"""
         super().resizeEvent(event)
@@ -1518,6 +2323,13 @@ class SonyToPhotoGUI(QMainWindow):
             # 确保背景 QLabel 始终铺满整个窗口
             self.background_label.setGeometry(0, 0, self.width(), self.height())
     
+    def closeEvent(self, event):
+        """关闭窗口时立即写入尚未保存的配置。"""
+        if self._save_timer.isActive():
+            self._save_timer.stop()
+            self._do_save_config()
+        super().closeEvent(event)
+    
     def init_ui(self):
         """Initialize the UI components."""
         self.setWindowTitle("Sony HLG 视频转码工具")
@@ -1565,6 +2377,30 @@ class SonyToPhotoGUI(QMainWindow):
         self.gpu_usage_cache = "--"
         self.gpu_check_counter = 0
         self.gpu_check_interval = 3  # 每3秒检测一次GPU（而不是每秒）
+        # 内存占用变化较慢，每4秒读取一次（CPU使用率每秒读取）
+        self.memory_check_counter = 0
+        self.memory_check_interval = 4
+        
+        # NVML可用时直接读取GPU使用率（无需启动 nvidia-smi 进程），显卡句柄只获取一次
+        self._nvml_handle = None
+        if NVML_AVAILABLE:
+            try:
+                self._nvml_handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+            except Exception:
+                pass
+        
+        # 否则由一个常驻线程按定时器的请求运行 nvidia-smi（同一时间最多一个查询）；
+        # 没有 nvidia-smi 时（非NVIDIA显卡）不再检测GPU使用率
+        self._gpu_tick = threading.Event()
+        self.gpu_usage_updated.connect(self._show_gpu_usage)
+        if self._nvml_handle is None:
+            if shutil.which('nvidia-smi'):
+                threading.Thread(target=self._gpu_monitor_loop, daemon=True).start()
+            else:
+                self.gpu_check_interval = float('inf')
+        
+        # psutil.cpu_percent() 返回与上次调用之间的平均值，首次调用只用于建立基准
+        psutil.cpu_percent()
         
         # Input section
         input_group = QGroupBox("输入设置")
@@ -1622,13 +2458,11 @@ class SonyToPhotoGUI(QMainWindow):
         self.keep_original_name_check = QCheckBox("保留原始文件名")
         self.keep_original_name_check.setChecked(True)
         self.keep_original_name_check.stateChanged.connect(self.on_keep_original_name_changed)
-        self.keep_original_name_check.stateChanged.connect(self.save_config)
         naming_options_layout.addWidget(self.keep_original_name_check)
         
         self.custom_filename_check = QCheckBox("自定义文件名")
         self.custom_filename_check.setChecked(False)
         self.custom_filename_check.stateChanged.connect(self.on_custom_filename_changed)
-        self.custom_filename_check.stateChanged.connect(self.save_config)
         naming_options_layout.addWidget(self.custom_filename_check)
         output_naming_layout.addLayout(naming_options_layout)
         
@@ -1664,15 +2498,17 @@ class SonyToPhotoGUI(QMainWindow):
         
         # Transcoding settings
         transcode_group = QGroupBox("转码设置")
+        # 所有 ComboBox 都在转码设置中，在创建控件前统一设置一次样式
+        transcode_group.setStyleSheet(COMBO_BOX_STYLE)
         transcode_layout = QVBoxLayout()
         
         # Codec setting
         codec_layout = QHBoxLayout()
         codec_layout.addWidget(QLabel("编码格式:"))
         self.codec_combo = NoWheelComboBox()
-        self.codec_combo.addItems(['H.265 (HEVC)', 'H.264 (AVC)'])
-        self.codec_combo.setCurrentText('H.265 (HEVC)')
-        self.codec_combo.currentIndexChanged.connect(self.update_gpu_encoders)
+        for codec, codec_display in CODEC_DISPLAY.items():
+            self.codec_combo.addItem(codec_display, codec)
+        self.codec_combo.setCurrentIndex(0)
         self.codec_combo.currentIndexChanged.connect(self.save_config)
         codec_layout.addWidget(self.codec_combo, 1)
         transcode_layout.addLayout(codec_layout)
@@ -1687,6 +2523,21 @@ class SonyToPhotoGUI(QMainWindow):
         crf_layout.addWidget(self.crf_spin)
         transcode_layout.addLayout(crf_layout)
         
+        # 最大码率（在CRF质量模式基础上限制码率峰值）
+        max_bitrate_layout = QHBoxLayout()
+        max_bitrate_layout.addWidget(QLabel("最大码率 (Mbps):"))
+        self.max_bitrate_spin = NoWheelSpinBox()
+        self.max_bitrate_spin.setRange(0, 400)
+        self.max_bitrate_spin.setValue(0)
+        self.max_bitrate_spin.setSpecialValueText("不限制")
+        self.max_bitrate_spin.valueChanged.connect(self.save_config)
+        max_bitrate_layout.addWidget(self.max_bitrate_spin)
+        max_bitrate_hint = QLabel("(限制码率峰值，使输出文件大小更可控)")
+        max_bitrate_hint.setStyleSheet("color: gray; font-size: 10px;")
+        max_bitrate_layout.addWidget(max_bitrate_hint)
+        max_bitrate_layout.addStretch()
+        transcode_layout.addLayout(max_bitrate_layout)
+        
         # Preset setting
         preset_layout = QHBoxLayout()
         preset_layout.addWidget(QLabel("编码预设:"))
@@ -1727,20 +2578,19 @@ class SonyToPhotoGUI(QMainWindow):
         self.enable_gpu_check = QCheckBox("启用GPU加速")
         self.enable_gpu_check.setChecked(True)
         self.enable_gpu_check.stateChanged.connect(self.toggle_gpu_encoder)
-        self.enable_gpu_check.stateChanged.connect(self.save_config)
         transcode_layout.addWidget(self.enable_gpu_check)
         
         # GPU Encoder setting (隐藏，因为现在自动选择)
         gpu_layout = QHBoxLayout()
-        self.gpu_label = QLabel("GPU编码器:")
-        gpu_layout.addWidget(self.gpu_label)
+        self.gpu_encoder_label = QLabel("GPU编码器:")
+        gpu_layout.addWidget(self.gpu_encoder_label)
         self.gpu_combo = QComboBox()
         # 不再需要填充编码器列表，因为自动选择
         gpu_layout.addWidget(self.gpu_combo, 1)
         transcode_layout.addLayout(gpu_layout)
         
         # 初始隐藏GPU编码器选择控件
-        self.gpu_label.setVisible(False)
+        self.gpu_encoder_label.setVisible(False)
         self.gpu_combo.setVisible(False)
         
         # Threads setting
@@ -1758,6 +2608,21 @@ class SonyToPhotoGUI(QMainWindow):
         threads_layout.addStretch()  # 添加弹性空间，使说明文字靠左
         transcode_layout.addLayout(threads_layout)
         
+        # 每个ffmpeg进程的线程数（仅CPU编码时生效）
+        ffmpeg_threads_layout = QHBoxLayout()
+        ffmpeg_threads_layout.addWidget(QLabel("每个ffmpeg线程数:"))
+        self.ffmpeg_threads_spin = NoWheelSpinBox()
+        self.ffmpeg_threads_spin.setRange(0, max(1, os.cpu_count() or 1))
+        self.ffmpeg_threads_spin.setValue(0)
+        self.ffmpeg_threads_spin.setSpecialValueText("自动")
+        self.ffmpeg_threads_spin.valueChanged.connect(self.save_config)
+        ffmpeg_threads_layout.addWidget(self.ffmpeg_threads_spin)
+        ffmpeg_threads_hint = QLabel("(仅CPU编码时生效，自动表示按并行数量平分CPU核心)")
+        ffmpeg_threads_hint.setStyleSheet("color: gray; font-size: 10px;")
+        ffmpeg_threads_layout.addWidget(ffmpeg_threads_hint)
+        ffmpeg_threads_layout.addStretch()
+        transcode_layout.addLayout(ffmpeg_threads_layout)
+        
         transcode_group.setLayout(transcode_layout)
         main_layout.addWidget(transcode_group)
         
@@ -1798,6 +2663,12 @@ class SonyToPhotoGUI(QMainWindow):
         self.task_table.setColumnCount(4)
         self.task_table.setHorizontalHeaderLabels(["文件/文件夹", "编码格式", "状态", "操作"])
         self.task_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # 按整行选中，便于通过 selectedRows() 获取选中的任务
+        self.task_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        # “移除”按钮由委托绘制，所有行共用一个委托
+        self._remove_delegate = RemoveButtonDelegate(self.task_table)
+        self._remove_delegate.remove_requested.connect(self.remove_task_by_index)
+        self.task_table.setItemDelegateForColumn(3, self._remove_delegate)
         task_queue_layout.addWidget(self.task_table)
         
         # Task control buttons
@@ -1868,13 +2739,20 @@ class SonyToPhotoGUI(QMainWindow):
         self.log_edit.setReadOnly(True)
         self.log_edit.setPlaceholderText("操作日志将显示在这里...")
         main_layout.addWidget(self.log_edit, 1)
+        # 待写入日志框的消息，由定时器合并写入
+        self._log_pending = []
+        self._log_timer = QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.timeout.connect(self._flush_log)
         
         # 初始化文件进度字典
         self.file_progress_dict = {}
-        
-        # 设置所有 ComboBox 的样式（白色背景，黑色文字）
-        # 必须在所有 ComboBox 创建完成后调用
-        self.set_combo_box_styles()
+        # 文件名 -> 进度详情中对应的文本块编号；等待刷新的文件名（dict 保持首次出现的顺序）
+        self._progress_blocks = {}
+        self._pending_progress = {}
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setSingleShot(True)
+        self._progress_timer.timeout.connect(self._flush_file_progress)
     
     def browse_input(self):
         """Browse for input file or directory."""
@@ -1939,6 +2817,8 @@ class SonyToPhotoGUI(QMainWindow):
             # 恢复信号连接
             self.keep_original_name_check.blockSignals(False)
             self.custom_filename_check.blockSignals(False)
+        
+        self.save_config()
     
     def on_custom_filename_changed(self, state):
         """处理自定义文件名复选框状态改变，实现与保留原始文件名的互斥，且至少有一个被勾选。"""
@@ -1960,36 +2840,51 @@ class SonyToPhotoGUI(QMainWindow):
             # 恢复信号连接
             self.keep_original_name_check.blockSignals(False)
             self.custom_filename_check.blockSignals(False)
+        
+        self.save_config()
     
     def toggle_gpu_encoder(self):
         """Toggle GPU encoder combo box visibility based on GPU acceleration checkbox."""
         # 隐藏GPU编码器下拉框，因为现在自动选择
         self.gpu_combo.setVisible(False)
-        self.gpu_label.setVisible(False)
+        self.gpu_encoder_label.setVisible(False)
+        
+        self.save_config()
     
     def get_default_gpu_encoder(self, codec='hevc'):
         """获取系统默认的GPU编码器（优先使用上次成功的编码器，失败后按优先级回退）。
         特别注意：如果检测到Intel GPU，优先使用Intel编码器；如果Intel编码器不可用，返回None使用CPU编码。
         
+        选出的编码器按codec缓存；未选出编码器时不缓存（例如尚未安装ffmpeg），下次调用重新检测。
+        
         Args:
             codec: 编码格式 ('hevc' 或 'h264')
             
         Returns:
             优先匹配的GPU编码器名称，如果没有匹配的则返回None（使用CPU编码）
         """
+        encoder = self._default_gpu_encoders.get(codec)
+        if encoder is None:
+            encoder = self._select_default_gpu_encoder(codec)
+            if encoder is not None:
+                self._default_gpu_encoders[codec] = encoder
+        return encoder
+    
+    def _select_default_gpu_encoder(self, codec):
+        """按上次成功的编码器、GPU品牌和优先级选择默认GPU编码器（见 get_default_gpu_encoder）。"""
         try:
             ffmpeg_path = which_ffmpeg()
-            detected_encoders = detect_gpu_encoders(ffmpeg_path, codec)
+            detected_encoders = detect_gpu_encoders(str(ffmpeg_path), codec)
             
             if not detected_encoders:
                 return None
             
-            encoder_dict = {key: display for key, display in detected_encoders}
+            detected_names = {key for key, _ in detected_encoders}
             
             # 1. 优先使用上次成功的GPU编码器（从配置文件中读取）
             last_encoder_key = f'last_gpu_encoder_{codec}'
             last_encoder = self.config.get(last_encoder_key)
-            if last_encoder and last_encoder in encoder_dict:
+            if last_encoder and last_encoder in detected_names:
                 print(f"使用上次成功的GPU编码器: {last_encoder}")
                 return last_encoder
             
@@ -1997,23 +2892,9 @@ class SonyToPhotoGUI(QMainWindow):
             gpu_brand, gpu_model, gpu_type = get_gpu_info_standalone()
             
             if gpu_brand:
-                # 定义编码器优先级映射
-                if codec == 'hevc':
-                    encoder_priority = {
-                        'NVIDIA': 'h265_nvenc',
-                        'AMD': 'hevc_amf',
-                        'Intel': 'hevc_qsv'
-                    }
-                else:  # h264
-                    encoder_priority = {
-                        'NVIDIA': 'h264_nvenc',
-                        'AMD': 'h264_amf',
-                        'Intel': 'h264_qsv'
-                    }
-                
                 # 优先选择匹配GPU品牌的编码器
-                preferred_encoder = encoder_priority.get(gpu_brand)
-                if preferred_encoder and preferred_encoder in encoder_dict:
+                preferred_encoder = GPU_BRAND_ENCODERS.get(codec, GPU_BRAND_ENCODERS['h264']).get(gpu_brand)
+                if preferred_encoder and preferred_encoder in detected_names:
                     return preferred_encoder
                 
                 # 如果检测到Intel GPU但Intel编码器不可用，返回None使用CPU编码
@@ -2022,14 +2903,8 @@ class SonyToPhotoGUI(QMainWindow):
                     return None
             
             # 3. 如果没有检测到GPU品牌，但检测到了编码器，按优先级选择
-            # 优先级：NVIDIA > Intel > AMD
-            if codec == 'hevc':
-                priority_order = ['h265_nvenc', 'hevc_qsv', 'hevc_amf']
-            else:
-                priority_order = ['h264_nvenc', 'h264_qsv', 'h264_amf']
-            
-            for priority_encoder in priority_order:
-                if priority_encoder in encoder_dict:
+            for priority_encoder in GPU_ENCODER_PRIORITY.get(codec, GPU_ENCODER_PRIORITY['h264']):
+                if priority_encoder in detected_names:
                     return priority_encoder
             
             # 如果都不匹配，返回第一个可用的编码器
@@ -2046,21 +2921,21 @@ class SonyToPhotoGUI(QMainWindow):
         """
         return get_gpu_info_standalone()
     
-    def update_gpu_encoders(self):
-        """更新GPU编码器列表（现在仅用于内部检测，不显示给用户）。"""
-        # Get current codec
-        codec_text = self.codec_combo.currentText()
-        codec = 'hevc' if 'H.265' in codec_text or 'HEVC' in codec_text else 'h264'
-        
-        # 检测可用的GPU编码器（用于自动选择）
-        # 不再需要更新下拉框，因为用户不再需要选择
-        pass
+    def redetect_gpu(self):
+        """清除GPU检测缓存并重新检测GPU和GPU编码器。"""
+        clear_gpu_detection_cache()
+        self._default_gpu_encoders.clear()
+        gpu_brand, gpu_model, gpu_type = self.get_gpu_info()
+        if gpu_brand:
+            gpu_type_display = GPU_TYPE_DISPLAY.get(gpu_type, "核显")
+            self.log(f"已重新检测GPU: {gpu_brand} {gpu_model} ({gpu_type_display})")
+        else:
+            self.log("已重新检测GPU: 未检测到GPU")
     
     def get_transcode_params(self):
         """Get current transcode parameters from UI."""
         # Get selected codec first
-        codec_text = self.codec_combo.currentText()
-        codec = 'hevc' if 'H.265' in codec_text or 'HEVC' in codec_text else 'h264'
+        codec = self.codec_combo.currentData()
         
         # 如果启用GPU，自动获取系统默认的GPU编码器
         gpu_encoder = None
@@ -2071,6 +2946,7 @@ class SonyToPhotoGUI(QMainWindow):
         return {
             'codec': codec,
             'crf': self.crf_spin.value(),
+            'max_bitrate': self.max_bitrate_spin.value(),
             'preset': self.preset_combo.currentText(),
             'fps': self.fps_spin.value(),
             'keep_fps': self.keep_fps_check.isChecked(),
@@ -2080,6 +2956,7 @@ class SonyToPhotoGUI(QMainWindow):
             'recursive': self.recursive_check.isChecked(),
             'dry_run': self.dry_run_check.isChecked(),
             'threads': self.threads_spin.value(),
+            'ffmpeg_threads': self.ffmpeg_threads_spin.value(),
             'enable_gpu': self.enable_gpu_check.isChecked(),
             'gpu_encoder': gpu_encoder,
             'keep_original_name': self.keep_original_name_check.isChecked(),
@@ -2090,8 +2967,23 @@ class SonyToPhotoGUI(QMainWindow):
         }
     
     def log(self, message):
-        """Add message to log."""
-        self.log_edit.append(message)
+        """Add message to log (written to the log box in batches by _flush_log)."""
+        self._log_pending.append(message)
+        if not self._log_timer.isActive():
+            self._log_timer.start(LOG_FLUSH_MS)
+    
+    def _flush_log(self):
+        """将积累的日志一次性写入日志框，并只滚动一次。"""
+        if not self._log_pending:
+            return
+        text = "\n".join(self._log_pending)
+        self._log_pending.clear()
+        
+        cursor = QTextCursor(self.log_edit.document())
+        cursor.movePosition(QTextCursor.End)
+        if not self.log_edit.document().isEmpty():
+            cursor.insertBlock()
+        cursor.insertText(text)
         self.log_edit.verticalScrollBar().setValue(self.log_edit.verticalScrollBar().maximum())
     
     def start_transcoding(self):
@@ -2122,45 +3014,23 @@ class SonyToPhotoGUI(QMainWindow):
         self.log(f"输入: {input_path}")
         self.log(f"输出: {output_dir}")
         self.log(f"视频质量: CRF {params['crf']}")
+        if params['max_bitrate']:
+            self.log(f"最大码率: {params['max_bitrate']} Mbps")
         self.log(f"编码预设: {params['preset']}")
         
         # 显示编码格式
-        codec_display = 'H.265 (HEVC)' if params['codec'] == 'hevc' else 'H.264 (AVC)'
+        codec_display = CODEC_DISPLAY[params['codec']]
         self.log(f"编码格式: {codec_display}")
         
         # 显示编码器和GPU信息
         if params['enable_gpu']:
             if params['gpu_encoder']:
                 # 获取GPU信息
-                gpu_brand, gpu_model, gpu_type = self.get_gpu_info()
-                
-                # 编码器名称映射
-                encoder_name_map = {
-                    'h265_nvenc': 'h265_nvenc',
-                    'hevc_amf': 'hevc_amf',
-                    'hevc_qsv': 'hevc_qsv',
-                    'hevc_videotoolbox': 'hevc_videotoolbox',
-                    'h264_nvenc': 'h264_nvenc',
-                    'h264_amf': 'h264_amf',
-                    'h264_qsv': 'h264_qsv',
-                    'h264_videotoolbox': 'h264_videotoolbox'
-                }
-                encoder_name = encoder_name_map.get(params['gpu_encoder'], params['gpu_encoder'])
-                
-                # 构建GPU信息字符串
-                gpu_info_parts = []
-                if gpu_brand:
-                    gpu_info_parts.append(f"品牌: {gpu_brand}")
-                if gpu_model:
-                    gpu_info_parts.append(f"型号: {gpu_model}")
-                if gpu_type:
-                    gpu_type_display = "独显" if gpu_type == 'dedicated' else "核显"
-                    gpu_info_parts.append(f"类型: {gpu_type_display}")
-                gpu_info_str = f" ({', '.join(gpu_info_parts)})" if gpu_info_parts else ""
+                gpu_info_str = format_gpu_info(*self.get_gpu_info())
                 
-                self.log(f"编码器: {encoder_name} (GPU加速)")
-                if gpu_info_parts:
-                    self.log(f"GPU信息{gpu_info_str}")
+                self.log(f"编码器: {params['gpu_encoder']} (GPU加速)")
+                if gpu_info_str:
+                    self.log(f"GPU信息 ({gpu_info_str})")
             else:
                 # 使用CPU编码
                 cpu_encoder = 'libx265' if params['codec'] == 'hevc' else 'libx264'
@@ -2174,6 +3044,8 @@ class SonyToPhotoGUI(QMainWindow):
         
         self.log(f"音频比特率: {params['audio_bitrate']}")
         self.log(f"并行线程: {params['threads']}")
+        if params['ffmpeg_threads']:
+            self.log(f"每个ffmpeg线程数: {params['ffmpeg_threads']}")
         
         if params['dry_run']:
             self.log("模式: 模拟运行 (仅显示命令)")
@@ -2192,11 +3064,18 @@ class SonyToPhotoGUI(QMainWindow):
         """Cancel the transcoding process."""
         if self.worker and self.worker.isRunning():
             self.log("正在取消转码...")
-            self.worker.terminate()
-            self.worker.wait()
+            self.stop_worker(self.worker)
             self.log("转码已取消")
             self.reset_ui()
     
+    def stop_worker(self, worker):
+        """Cancel a worker and wait a bounded time for it to exit."""
+        worker.cancel()
+        if not worker.wait(WORKER_CANCEL_TIMEOUT_MS):
+            self.log("工作线程未能及时结束，将在后台继续退出")
+            self.stopping_workers = [w for w in self.stopping_workers if w.isRunning()]
+            self.stopping_workers.append(worker)
+    
     def transcoding_finished(self, ok, fail, skipped):
         """Handle transcoding finished signal."""
         self.log("\n=== 转码完成 ===")
@@ -2220,10 +3099,12 @@ class SonyToPhotoGUI(QMainWindow):
     
     def clear_log(self):
         """Clear the log text."""
+        self._log_pending.clear()
         self.log_edit.clear()
         self.progress_detail_edit.clear()
-        if hasattr(self, 'file_progress_dict'):
-            self.file_progress_dict.clear()
+        self.file_progress_dict.clear()
+        self._progress_blocks.clear()
+        self._pending_progress.clear()
     
     def update_file_progress(self, filename, status, progress_percent):
         """更新文件转码进度详情。
@@ -2233,42 +3114,50 @@ class SonyToPhotoGUI(QMainWindow):
             status: 状态（处理中/完成/失败/跳过）
             progress_percent: 进度百分比（0-100）
         """
-        # 初始化进度字典（如果不存在）
-        if not hasattr(self, 'file_progress_dict'):
-            self.file_progress_dict = {}
-        
         # 更新进度字典
         self.file_progress_dict[filename] = {
             'status': status,
             'progress': progress_percent
         }
         
-        # 更新显示
-        detail_text = "当前转码进度：\n"
-        detail_text += "=" * 60 + "\n"
-        
-        # 按进度排序显示
-        sorted_files = sorted(
-            self.file_progress_dict.items(),
-            key=lambda x: (x[1]['progress'], x[0]),
-            reverse=True
-        )
-        
-        for fname, info in sorted_files:
-            status_icon = {
-                '处理中': '⏳',
-                '完成': '✅',
-                '失败': '❌',
-                '跳过': '⏭️',
-                '等待': '⏸️'
-            }.get(info['status'], '•')
-            
+        # 合并短时间内的多次更新，定时刷新显示
+        self._pending_progress[filename] = None
+        if not self._progress_timer.isActive():
+            self._progress_timer.start(PROGRESS_REFRESH_MS)
+    
+    def _flush_file_progress(self):
+        """只重写有变化的文件所在的文本行，新文件追加到末尾。"""
+        if not self._progress_blocks:
+            self.progress_detail_edit.setPlainText("当前转码进度：\n" + "=" * 60)
+        
+        document = self.progress_detail_edit.document()
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        
+        for fname in self._pending_progress:
+            info = self.file_progress_dict.get(fname)
+            if info is None:
+                continue
+            status_icon = FILE_STATUS_ICONS.get(info['status'], '•')
             if info['status'] == '处理中':
-                detail_text += f"{status_icon} {fname} - {info['status']} ({info['progress']}%)\n"
+                line = f"{status_icon} {fname} - {info['status']} ({info['progress']}%)"
             else:
-                detail_text += f"{status_icon} {fname} - {info['status']}\n"
+                line = f"{status_icon} {fname} - {info['status']}"
+            
+            block_number = self._progress_blocks.get(fname)
+            if block_number is None:
+                cursor.movePosition(QTextCursor.End)
+                cursor.insertBlock()
+                cursor.insertText(line)
+                self._progress_blocks[fname] = cursor.blockNumber()
+            else:
+                cursor.setPosition(document.findBlockByNumber(block_number).position())
+                cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+                cursor.insertText(line)
+        
+        cursor.endEditBlock()
+        self._pending_progress.clear()
         
-        self.progress_detail_edit.setText(detail_text)
         # 自动滚动到底部
         self.progress_detail_edit.verticalScrollBar().setValue(
             self.progress_detail_edit.verticalScrollBar().maximum()
@@ -2278,6 +3167,13 @@ class SonyToPhotoGUI(QMainWindow):
         """创建菜单栏。"""
         menubar = self.menuBar()
         
+        # 工具菜单
+        tools_menu = menubar.addMenu('工具(&T)')
+        
+        # 重新检测GPU（清除检测缓存）
+        redetect_gpu_action = tools_menu.addAction('重新检测GPU(&G)')
+        redetect_gpu_action.triggered.connect(self.redetect_gpu)
+        
         # 帮助菜单
         help_menu = menubar.addMenu('帮助(&H)')
         
@@ -2289,20 +3185,44 @@ class SonyToPhotoGUI(QMainWindow):
         about_action = help_menu.addAction('关于(&A)')
         about_action.triggered.connect(self.show_about_dialog)
     
-    def show_help_dialog(self):
-        """显示使用说明对话框（支持滚动）。"""
-        # 从外部文件读取帮助文档
-        help_file = get_app_directory() / "help.html"
+    def load_html_document(self, filename, title, description):
+        """读取程序目录下的HTML文档；按文件修改时间缓存，文件未修改时不再读取。
+        
+        Args:
+            filename: 文档文件名（如 help.html）
+            title: 文档无法读取时显示的标题
+            description: 文档名称（用于错误提示）
+            
+        Returns:
+            str: HTML内容（无法读取时为提示信息）
+        """
+        html_file = get_app_directory() / filename
         try:
-            if help_file.exists():
-                with open(help_file, 'r', encoding='utf-8') as f:
-                    help_text = f.read()
-            else:
-                # 如果文件不存在，使用默认内容
-                help_text = "<h2>使用说明</h2><p>帮助文档文件 (help.html) 未找到。</p>"
+            mtime = html_file.stat().st_mtime_ns
+            cached = self._html_cache.get(filename)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            with open(html_file, 'r', encoding='utf-8') as f:
+                html_text = f.read()
+            self._html_cache[filename] = (mtime, html_text)
+            return html_text
+        except FileNotFoundError:
+            # 如果文件不存在，使用默认内容
+            return f"<h2>{title}</h2><p>{description}文件 ({filename}) 未找到。</p>"
         except Exception as e:
             # 如果读取失败，使用默认内容
-            help_text = f"<h2>使用说明</h2><p>读取帮助文档时出错：{str(e)}</p>"
+            return f"<h2>{title}</h2><p>读取{description}时出错：{str(e)}</p>"
+    
+    def show_help_dialog(self):
+        """显示使用说明对话框（支持滚动）。对话框只在首次打开时创建和排版。"""
+        if self._help_dialog is None:
+            self._help_dialog = self._build_help_dialog()
+        self._help_dialog.exec_()
+    
+    def _build_help_dialog(self):
+        """创建使用说明对话框。"""
+        # 从外部文件读取帮助文档
+        help_text = self.load_html_document("help.html", "使用说明", "帮助文档")
         
         # 创建自定义对话框（支持滚动和拉伸）
         dialog = QDialog(self)
@@ -2342,23 +3262,12 @@ class SonyToPhotoGUI(QMainWindow):
         
         layout.addLayout(button_layout)
         
-        # 显示对话框
-        dialog.exec_()
+        return dialog
     
     def show_about_dialog(self):
         """显示关于对话框。"""
         # 从外部文件读取关于信息
-        about_file = get_app_directory() / "about.html"
-        try:
-            if about_file.exists():
-                with open(about_file, 'r', encoding='utf-8') as f:
-                    about_text = f.read()
-            else:
-                # 如果文件不存在，使用默认内容
-                about_text = "<h2>Sony HLG 视频转码工具</h2><p>关于信息文件 (about.html) 未找到。</p>"
-        except Exception as e:
-            # 如果读取失败，使用默认内容
-            about_text = f"<h2>Sony HLG 视频转码工具</h2><p>读取关于信息时出错：{str(e)}</p>"
+        about_text = self.load_html_document("about.html", "Sony HLG 视频转码工具", "关于信息")
         
         QMessageBox.about(self, "关于", about_text)
     
@@ -2391,21 +3300,21 @@ class SonyToPhotoGUI(QMainWindow):
         self.task_queue.append(task)
         
         # Update task table
-        self.update_task_table()
+        self.append_task_row(task)
         
         self.log(f"任务已添加到队列: {input_path}")
     
     def remove_selected_task(self):
         """Remove selected task(s) from the queue."""
-        selected_rows = sorted([index.row() for index in self.task_table.selectedIndexes()], reverse=True)
-        
-        for row in selected_rows:
-            if 0 <= row < len(self.task_queue):
-                removed_task = self.task_queue.pop(row)
-                self.log(f"任务已从队列移除: {removed_task['input_path']}")
+        # selectedRows() 每个选中行只返回一项（表格按整行选中），倒序删除避免行号错位
+        selected_rows = sorted({index.row() for index in self.task_table.selectionModel().selectedRows()}, reverse=True)
         
-        # Update task table
-        self.update_task_table()
+        with batched_table_update(self.task_table):
+            for row in selected_rows:
+                if 0 <= row < len(self.task_queue):
+                    removed_task = self.task_queue.pop(row)
+                    self.task_table.removeRow(row)
+                    self.log(f"任务已从队列移除: {removed_task['input_path']}")
     
     def clear_task_queue(self):
         """Clear all tasks from the queue."""
@@ -2417,35 +3326,57 @@ class SonyToPhotoGUI(QMainWindow):
             self.log("任务队列为空")
     
     def update_task_table(self):
-        """Update the task table UI with the current queue."""
-        self.task_table.setRowCount(len(self.task_queue))
-        
-        for i, task in enumerate(self.task_queue):
-            # File/folder path
-            path_item = QTableWidgetItem(task['input_path'])
-            path_item.setFlags(path_item.flags() & ~Qt.ItemIsEditable)
-            self.task_table.setItem(i, 0, path_item)
-            
-            # Codec
-            codec_item = QTableWidgetItem('H.265 (HEVC)' if task['params']['codec'] == 'hevc' else 'H.264 (AVC)')
-            codec_item.setFlags(codec_item.flags() & ~Qt.ItemIsEditable)
-            self.task_table.setItem(i, 1, codec_item)
-            
-            # Status
-            status_item = QTableWidgetItem(task['status'])
-            status_item.setFlags(status_item.flags() & ~Qt.ItemIsEditable)
-            self.task_table.setItem(i, 2, status_item)
-            
-            # Operation (remove button)
-            remove_btn = QPushButton("移除")
-            remove_btn.clicked.connect(lambda checked, idx=i: self.remove_task_by_index(idx))
-            self.task_table.setCellWidget(i, 3, remove_btn)
+        """Update the task table UI with the current queue.
+        
+        Repaints and signals are suspended while the rows are rebuilt so the
+        table lays out once instead of once per cell.
+        """
+        with batched_table_update(self.task_table):
+            self.task_table.setRowCount(len(self.task_queue))
+            for i, task in enumerate(self.task_queue):
+                self._set_task_row(i, task)
+    
+    def _set_task_row(self, i, task):
+        """Fill row i of the task table from a task dict."""
+        # File/folder path
+        path_item = QTableWidgetItem(task['input_path'])
+        path_item.setFlags(path_item.flags() & ~Qt.ItemIsEditable)
+        self.task_table.setItem(i, 0, path_item)
+        
+        # Codec
+        codec_item = QTableWidgetItem(CODEC_DISPLAY[task['params']['codec']])
+        codec_item.setFlags(codec_item.flags() & ~Qt.ItemIsEditable)
+        self.task_table.setItem(i, 1, codec_item)
+        
+        # Status
+        status_item = QTableWidgetItem(task['status'])
+        status_item.setFlags(status_item.flags() & ~Qt.ItemIsEditable)
+        self.task_table.setItem(i, 2, status_item)
+        # Operation column (remove button) is painted by RemoveButtonDelegate
+    
+    def append_task_row(self, task):
+        """Append a row for a newly queued task without rebuilding the table."""
+        row = self.task_table.rowCount()
+        self.task_table.insertRow(row)
+        self._set_task_row(row, task)
+    
+    def set_task_status(self, index, status):
+        """Set the status of one queued task and refresh only its status cell."""
+        self.task_queue[index]['status'] = status
+        status_item = self.task_table.item(index, 2)
+        if status_item is not None:
+            status_item.setText(status)
+        else:
+            self.update_task_table()
     
     def remove_task_by_index(self, index):
         """Remove a task from the queue by index."""
+        # 队列运行时不允许移除（与“移除选中”按钮一致），否则当前任务序号会错位
+        if self.is_queue_running:
+            return
         if 0 <= index < len(self.task_queue):
             removed_task = self.task_queue.pop(index)
-            self.update_task_table()
+            self.task_table.removeRow(index)
             self.log(f"任务已从队列移除: {removed_task['input_path']}")
     
     def start_task_queue(self):
@@ -2481,8 +3412,7 @@ class SonyToPhotoGUI(QMainWindow):
         
         # Get current task
         current_task = self.task_queue[self.current_task_index]
-        current_task['status'] = '执行中'
-        self.update_task_table()
+        self.set_task_status(self.current_task_index, '执行中')
         
         # Execute the task
         self.log(f"开始执行任务 {self.current_task_index + 1}/{len(self.task_queue)}: {current_task['input_path']}")
@@ -2502,14 +3432,7 @@ class SonyToPhotoGUI(QMainWindow):
     def queue_task_finished(self, ok, fail, skipped):
         """Handle the completion of a queue task."""
         if self.current_task_index < len(self.task_queue):
-            current_task = self.task_queue[self.current_task_index]
-            
-            if fail > 0:
-                current_task['status'] = '失败'
-            else:
-                current_task['status'] = '完成'
-            
-            self.update_task_table()
+            self.set_task_status(self.current_task_index, '失败' if fail > 0 else '完成')
             
             # Increment task index
             self.current_task_index += 1
@@ -2520,8 +3443,9 @@ class SonyToPhotoGUI(QMainWindow):
                 self.is_queue_running = False
                 self.reset_queue_ui()
             else:
-                # Execute next task
-                self.execute_next_task()
+                # 推迟到事件循环下一轮再启动下一个任务，让当前信号处理先返回、
+                # 两次状态变更合并为一次重绘（execute_next_task 会重新检查暂停/停止状态）
+                QTimer.singleShot(0, self.execute_next_task)
     
     def pause_resume_task(self):
         """Pause or resume the task queue."""
@@ -2540,32 +3464,30 @@ class SonyToPhotoGUI(QMainWindow):
                 
                 # Update current task status
                 if self.current_task_index < len(self.task_queue):
-                    current_task = self.task_queue[self.current_task_index]
-                    current_task['status'] = '暂停中'
-                    self.update_task_table()
+                    self.set_task_status(self.current_task_index, '暂停中')
         else:
             self.log("队列已恢复")
             self.pause_resume_btn.setText("暂停")
             
             # Resume execution
-            if self.current_queue_worker and self.current_task_index < len(self.task_queue):
+            if (self.current_queue_worker and self.current_queue_worker.isRunning()
+                    and self.current_task_index < len(self.task_queue)):
                 # Unpause the current worker
                 self.current_queue_worker.is_paused = False
                 # Update task status
-                self.task_queue[self.current_task_index]['status'] = '执行中'
-                self.update_task_table()
+                self.set_task_status(self.current_task_index, '执行中')
             else:
-                # If no current worker, execute next task
+                # No running worker (none yet, or the last one finished while
+                # paused and its deferred execute_next_task returned early)
                 self.execute_next_task()
     
     def stop_task_queue(self):
         """Stop the task queue."""
         self.log("正在停止队列...")
         
-        # Terminate current worker if running
+        # Stop current worker if running (terminates its ffmpeg processes)
         if self.current_queue_worker and self.current_queue_worker.isRunning():
-            self.current_queue_worker.terminate()
-            self.current_queue_worker.wait()
+            self.stop_worker(self.current_queue_worker)
         
         # Update status of remaining tasks
         for i in range(self.current_task_index, len(self.task_queue)):
@@ -2591,53 +3513,6 @@ class SonyToPhotoGUI(QMainWindow):
         self.clear_queue_btn.setEnabled(True)
         self.pause_resume_btn.setText("暂停")
     
-    def get_gpu_usage(self):
-        """获取GPU使用率（支持NVIDIA、AMD、Intel）"""
-        try:
-            # 尝试NVIDIA GPU检测
-            result = subprocess.run(
-                ['nvidia-smi', '--query-gpu=utilization.gpu', '--format=csv,noheader,nounits'],
-                capture_output=True,
-                text=True,
-                timeout=1,
-                creationflags=CREATE_NO_WINDOW if sys.platform == "win32" else 0
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                gpu_usage = result.stdout.strip()
-                return f"{gpu_usage}%"
-            
-            # 尝试AMD GPU检测（使用wmic命令）
-            result = subprocess.run(
-                ['wmic', 'path', 'win32_VideoController', 'get', 'LoadPercentage'],
-                capture_output=True,
-                text=True,
-                timeout=1,
-                creationflags=CREATE_NO_WINDOW if sys.platform == "win32" else 0
-            )
-            if result.returncode == 0 and 'LoadPercentage' in result.stdout:
-                lines = result.stdout.strip().split('\n')[1:]
-                for line in lines:
-                    usage = line.strip()
-                    if usage and usage.isdigit():
-                        return f"{usage}%"
-            
-            # 尝试Intel GPU检测（使用PowerShell）
-            result = subprocess.run(
-                ['powershell', '-Command', 
-                 "(Get-CimInstance -Namespace 'root\\WMI' -ClassName 'MSGraphicsAdapter' | " +
-                 "Select-Object -ExpandProperty CurrentUsage).ToString()"],
-                capture_output=True,
-                text=True,
-                timeout=1,
-                creationflags=CREATE_NO_WINDOW if sys.platform == "win32" else 0
-            )
-            if result.returncode == 0 and result.stdout.strip().isdigit():
-                return f"{result.stdout.strip()}%"
-            
-            return "--%"
-        except Exception:
-            return "--%"
-    
     def update_resource_monitoring(self):
         """Update resource monitoring data and refresh UI.
         优化：CPU和内存检测在主线程（快速），GPU检测使用缓存和后台线程（避免卡顿）。
@@ -2647,35 +3522,46 @@ class SonyToPhotoGUI(QMainWindow):
             cpu_usage = psutil.cpu_percent()
             self.cpu_label.setText(f"CPU使用率: {cpu_usage:.1f}%")
             
-            # Memory Usage（快速，在主线程执行）
-            memory = psutil.virtual_memory()
-            self.memory_label.setText(f"内存占用: {memory.percent:.1f}%")
+            # Memory Usage（快速，在主线程执行；降低读取频率）
+            if self.memory_check_counter == 0:
+                memory = psutil.virtual_memory()
+                self.memory_label.setText(f"内存占用: {memory.percent:.1f}%")
+            self.memory_check_counter = (self.memory_check_counter + 1) % self.memory_check_interval
             
             # GPU Usage（使用缓存，减少检测频率，避免卡顿）
             self.gpu_check_counter += 1
             if self.gpu_check_counter >= self.gpu_check_interval:
-                # 每3秒检测一次GPU，使用后台线程避免阻塞UI
                 self.gpu_check_counter = 0
-                # 使用线程执行GPU检测，避免阻塞UI
-                threading.Thread(target=self._update_gpu_usage_async, daemon=True).start()
-            
-            # 显示缓存的GPU使用率
-            self.gpu_label.setText(f"GPU使用率: {self.gpu_usage_cache}")
+                if self._nvml_handle is not None:
+                    # NVML查询很快，直接在主线程执行
+                    utilization = pynvml.nvmlDeviceGetUtilizationRates(self._nvml_handle)
+                    self.gpu_usage_cache = f"{utilization.gpu}%"
+                    self.gpu_label.setText(f"GPU使用率: {self.gpu_usage_cache}")
+                else:
+                    # 每3秒检测一次GPU，由后台线程执行避免阻塞UI（上一次查询未结束时请求会合并）
+                    self._gpu_tick.set()
             
         except Exception as e:
             # Silently handle errors to prevent UI freezing
             pass
     
-    def _update_gpu_usage_async(self):
-        """在后台异步更新GPU使用率（避免阻塞UI线程）。"""
-        try:
-            gpu_usage = self._get_gpu_usage_sync()
-            if gpu_usage:
-                self.gpu_usage_cache = gpu_usage
-                # 使用QTimer在主线程中更新UI（线程安全）
-                QTimer.singleShot(0, lambda: self.gpu_label.setText(f"GPU使用率: {gpu_usage}"))
-        except Exception:
-            pass
+    def _gpu_monitor_loop(self):
+        """GPU使用率查询线程：每次收到定时器的请求后查询一次（避免阻塞UI线程）。"""
+        while self.gpu_check_interval != float('inf'):
+            self._gpu_tick.wait()
+            self._gpu_tick.clear()
+            try:
+                gpu_usage = self._get_gpu_usage_sync()
+                if gpu_usage:
+                    self.gpu_usage_cache = gpu_usage
+                    # 通过信号在主线程中更新UI（线程安全）
+                    self.gpu_usage_updated.emit(gpu_usage)
+            except Exception:
+                pass
+    
+    def _show_gpu_usage(self, gpu_usage):
+        """显示GPU使用率。"""
+        self.gpu_label.setText(f"GPU使用率: {gpu_usage}")
     
     def _get_gpu_usage_sync(self):
         """同步获取GPU使用率（在后台线程中调用）。"""
@@ -2687,32 +3573,16 @@ class SonyToPhotoGUI(QMainWindow):
                 capture_output=True,
                 text=True,
                 timeout=0.5,  # 减少超时时间，加快响应
-                creationflags=CREATE_NO_WINDOW if sys.platform == "win32" else 0
+                creationflags=SUBPROCESS_CREATIONFLAGS,
+                startupinfo=SUBPROCESS_STARTUPINFO
             )
             if result.returncode == 0 and result.stdout.strip():
                 gpu_usage = result.stdout.strip() + "%"
                 return gpu_usage
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            pass
-        
-        try:
-            # Try AMD GPUs using wmic (Windows)
-            if sys.platform == "win32":
-                result = subprocess.run(
-                    ['wmic', 'path', 'win32_VideoController', 'get', 'LoadPercentage'],
-                    capture_output=True,
-                    text=True,
-                    timeout=0.5,
-                    creationflags=CREATE_NO_WINDOW if sys.platform == "win32" else 0
-                )
-                if result.returncode == 0 and 'LoadPercentage' in result.stdout:
-                    lines = result.stdout.strip().split('\n')[1:]
-                    for line in lines:
-                        usage = line.strip()
-                        if usage and usage.isdigit():
-                            gpu_usage = f"{usage}%"
-                            return gpu_usage
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+        except FileNotFoundError:
+            # 没有 nvidia-smi（非NVIDIA显卡），不再定期尝试启动
+            self.gpu_check_interval = float('inf')
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
             pass
         
         # 不再尝试PowerShell，因为它太慢且容易导致卡顿
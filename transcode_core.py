@@ -20,12 +20,21 @@ from __future__ import annotations
 import argparse
 import os
 import shlex
+import signal
 import subprocess
 import sys
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# psutil 可选：Windows 下用于挂起/恢复 ffmpeg 进程（POSIX 使用 SIGSTOP/SIGCONT）
+try:
+    import psutil
+except ImportError:
+    psutil = None
 
 # Windows下隐藏subprocess窗口的标志
 if sys.platform == "win32":
@@ -38,37 +47,69 @@ if sys.platform == "win32":
 else:
     CREATE_NO_WINDOW = 0
 
+# 所有子进程调用共用的启动参数（导入时计算一次）
+# Windows 下同时设置 STARTUPINFO 隐藏窗口，彻底避免控制台窗口闪烁
+SUBPROCESS_CREATIONFLAGS = CREATE_NO_WINDOW
+if sys.platform == "win32":
+    SUBPROCESS_STARTUPINFO = subprocess.STARTUPINFO()
+    SUBPROCESS_STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    SUBPROCESS_STARTUPINFO.wShowWindow = subprocess.SW_HIDE
+else:
+    SUBPROCESS_STARTUPINFO = None
+
+
+VIDEO_EXTS = frozenset({".mov", ".mp4", ".mxf", ".m4v"})
 
-VIDEO_EXTS = {".mov", ".mp4", ".mxf", ".m4v"}
+# 子进程管道缓冲区大小（1 MiB），减少读取进度输出时的系统调用次数
+PIPE_BUFFER_SIZE = 1 << 20
 
 
 class ProgressBar:
-    """简单的命令行进度条显示。"""
+    """简单的命令行进度条显示。
+    
+    不加锁：只应在汇总结果的线程中更新（并行处理时由主线程统一更新）。
+    """
+    
+    BAR_LENGTH = 50
     
     def __init__(self, total: int, prefix: str = "处理中", suffix: str = "完成"):
         self.total = total
         self.prefix = prefix
         self.suffix = suffix
         self.current = 0
-        self.lock = threading.Lock()
+        # 预先生成所有长度的进度条字符串；显示内容未变化时不重复输出
+        self._bars = ["█" * i + "-" * (self.BAR_LENGTH - i) for i in range(self.BAR_LENGTH + 1)]
+        self._last_text = None
         
     def update(self, increment: int = 1):
         """按增量更新进度条。"""
-        with self.lock:
-            self.current += increment
-            percent = 100 * (self.current / self.total)
-            bar_length = 50
-            filled_length = int(bar_length * self.current // self.total)
-            bar = "█" * filled_length + "-" * (bar_length - filled_length)
-            sys.stdout.write(f"\r{self.prefix}: |{bar}| {percent:.1f}% {self.suffix}")
-            sys.stdout.flush()
-            if self.current == self.total:
-                sys.stdout.write("\n")
+        self.current += increment
+        self._draw(self.current)
+        if self.current == self.total:
+            sys.stdout.write("\n")
+    
+    def set_partial(self, fraction: float):
+        """显示当前文件的部分进度（0-1），不改变已完成的文件数。"""
+        self._draw(self.current + min(max(fraction, 0.0), 0.999))
+    
+    def _draw(self, done: float):
+        percent = 100 * (done / self.total)
+        filled_length = int(self.BAR_LENGTH * done // self.total)
+        text = f"\r{self.prefix}: |{self._bars[filled_length]}| {percent:.1f}% {self.suffix}"
+        if text == self._last_text:
+            return
+        self._last_text = text
+        sys.stdout.write(text)
+        sys.stdout.flush()
 
 
+@lru_cache(maxsize=2)
 def which_ffmpeg(allow_missing: bool = False) -> str:
     """返回 ffmpeg 可执行文件名称/路径（如果可用）；否则抛出异常。
     
+    找到的路径在进程内缓存（未找到时不缓存，下次调用会重新查找）；
+    需要重新查找时调用 which_ffmpeg.cache_clear()。
+    
     参数:
         allow_missing: 如果为 True，即使未找到也返回 "ffmpeg"（用于测试）
         
@@ -83,55 +124,36 @@ def which_ffmpeg(allow_missing: bool = False) -> str:
     
     # 检查 PyInstaller 打包的 ffmpeg（在临时目录中）
     if getattr(sys, 'frozen', False):
-        # 运行在 PyInstaller 打包环境中
+        # 运行在 PyInstaller 打包环境中：首先检查 Project 子目录（如 --add-data 中指定的），
+        # 然后回退到临时目录根目录
         base_path = Path(sys._MEIPASS)
-        # 首先检查 Project 子目录（如 --add-data 中指定的）
-        local_ffmpeg = base_path / "Project" / "ffmpeg.exe"
-        
-        if not local_ffmpeg.exists():
-            # 回退到临时目录根目录
-            local_ffmpeg = base_path / "ffmpeg.exe"
+        local_ffmpeg = _first_existing((base_path / "Project" / "ffmpeg.exe", base_path / "ffmpeg.exe"))
         
-        if local_ffmpeg.exists():
-            try:
-                subprocess.run(
-                    [str(local_ffmpeg), "-version"], 
-                    stdout=subprocess.DEVNULL, 
-                    stderr=subprocess.DEVNULL, 
-                    check=True,
-                    creationflags=CREATE_NO_WINDOW if sys.platform == "win32" else 0
-                )
-                return str(local_ffmpeg)
-            except Exception:
-                # 如果打包的 ffmpeg 存在但运行失败，继续检查其他位置
-                pass
-    
-    # 首先检查当前工作目录中的 ffmpeg
-    current_dir = Path.cwd()
-    local_ffmpeg = current_dir / "ffmpeg.exe"
-    
-    # 如果未找到，检查脚本所在目录
-    if not local_ffmpeg.exists():
-        script_dir = Path(__file__).parent
-        local_ffmpeg = script_dir / "ffmpeg.exe"
-    
-    # 如果未找到，检查 Project 子目录（打包 ffmpeg 的常见位置）
-    if not local_ffmpeg.exists():
-        script_dir = Path(__file__).parent
-        local_ffmpeg = script_dir / "Project" / "ffmpeg.exe"
+        # 打包的 ffmpeg 由构建脚本放入，直接信任，不再启动 "-version" 验证
+        # （Windows 下创建进程开销较大；空文件视为打包损坏，继续检查其他位置）
+        if local_ffmpeg is not None and local_ffmpeg.is_file() and local_ffmpeg.stat().st_size > 0:
+            return str(local_ffmpeg)
     
-    # 如果未找到，检查当前工作目录的 Project 子目录
-    if not local_ffmpeg.exists():
-        local_ffmpeg = current_dir / "Project" / "ffmpeg.exe"
+    # 按顺序检查：当前工作目录、脚本所在目录、脚本目录的 Project 子目录（打包 ffmpeg 的常见位置）、
+    # 当前工作目录的 Project 子目录
+    current_dir = Path.cwd()
+    script_dir = Path(__file__).parent
+    local_ffmpeg = _first_existing((
+        current_dir / "ffmpeg.exe",
+        script_dir / "ffmpeg.exe",
+        script_dir / "Project" / "ffmpeg.exe",
+        current_dir / "Project" / "ffmpeg.exe",
+    ))
     
-    if local_ffmpeg.exists():
+    if local_ffmpeg is not None:
         try:
             subprocess.run(
                 [str(local_ffmpeg), "-version"], 
                 stdout=subprocess.DEVNULL, 
                 stderr=subprocess.DEVNULL, 
                 check=True,
-                creationflags=CREATE_NO_WINDOW if sys.platform == "win32" else 0
+                creationflags=SUBPROCESS_CREATIONFLAGS,
+                startupinfo=SUBPROCESS_STARTUPINFO
             )
             return str(local_ffmpeg)
         except Exception:
@@ -146,7 +168,8 @@ def which_ffmpeg(allow_missing: bool = False) -> str:
             stdout=subprocess.DEVNULL, 
             stderr=subprocess.DEVNULL, 
             check=True,
-            creationflags=CREATE_NO_WINDOW if sys.platform == "win32" else 0
+            creationflags=SUBPROCESS_CREATIONFLAGS,
+            startupinfo=SUBPROCESS_STARTUPINFO
         )
         return system_ffmpeg
     except FileNotFoundError:
@@ -164,39 +187,303 @@ Installation guide for Windows:
         raise RuntimeError(f"Unexpected error checking ffmpeg: {e}") from e
 
 
-def run(cmd: List[str], dry_run: bool = False, test_mode: bool = False, is_paused: Optional[callable] = None) -> int:
+def _first_existing(candidates: Tuple[Path, ...]) -> Optional[Path]:
+    """返回候选路径中第一个存在的路径；都不存在时返回 None。"""
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def which_ffprobe(ffmpeg: str) -> str:
+    """返回与 ffmpeg 同目录的 ffprobe 路径（打包的 ffmpeg 与 ffprobe 放在一起；"ffmpeg" 对应 PATH 中的 "ffprobe"）。"""
+    directory, name = os.path.split(ffmpeg)
+    return os.path.join(directory, name.replace("ffmpeg", "ffprobe", 1))
+
+
+def probe_duration(ffmpeg: str, in_file: Path) -> Optional[float]:
+    """使用 ffprobe 读取视频时长（秒）。
+    
+    结果按 (路径, 修改时间, 大小) 缓存：同一文件再次转码（如加入队列的 HEVC/H.264 两个任务）
+    不会重复启动 ffprobe，文件被替换后则重新读取。
+    
+    参数:
+        ffmpeg: ffmpeg 可执行文件路径（ffprobe 从同一目录查找）
+        in_file: 输入视频文件路径
+        
+    返回:
+        时长（秒）；无法读取时返回 None
+    """
+    try:
+        st = os.stat(in_file)
+    except OSError:
+        return None
+    return _probe_duration_cached(ffmpeg, os.fspath(in_file), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=1024)
+def _probe_duration_cached(ffmpeg: str, in_file: str, mtime_ns: int, size: int) -> Optional[float]:
+    """probe_duration 的实际实现（mtime_ns 和 size 只用作缓存键）。"""
+    try:
+        result = subprocess.run(
+            [
+                which_ffprobe(ffmpeg), "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "csv=p=0",
+                in_file,
+            ],
+            capture_output=True,
+            timeout=10,
+            creationflags=SUBPROCESS_CREATIONFLAGS,
+            startupinfo=SUBPROCESS_STARTUPINFO
+        )
+        if result.returncode == 0:
+            return float(result.stdout.strip()) or None
+    except (OSError, subprocess.SubprocessError, ValueError):
+        # ffprobe 不存在或输出 N/A
+        pass
+    return None
+
+
+def probe_audio(ffmpeg: str, in_file: Path) -> Optional[Tuple[Tuple[str, int], ...]]:
+    """使用 ffprobe 读取所有音频流的 (编码格式, 声道数)。
+    
+    与 probe_duration 一样按 (路径, 修改时间, 大小) 缓存。
+    
+    返回:
+        每条音频流的 (codec_name, channels)，按流顺序排列（没有音频流时为空）；无法读取时返回 None
+    """
+    try:
+        st = os.stat(in_file)
+    except OSError:
+        return None
+    return _probe_audio_cached(ffmpeg, os.fspath(in_file), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=1024)
+def _probe_audio_cached(ffmpeg: str, in_file: str, mtime_ns: int, size: int) -> Optional[Tuple[Tuple[str, int], ...]]:
+    """probe_audio 的实际实现（mtime_ns 和 size 只用作缓存键）。"""
+    try:
+        result = subprocess.run(
+            [
+                which_ffprobe(ffmpeg), "-v", "error",
+                "-select_streams", "a",
+                "-show_entries", "stream=codec_name,channels",
+                "-of", "csv=p=0",
+                in_file,
+            ],
+            capture_output=True,
+            timeout=10,
+            creationflags=SUBPROCESS_CREATIONFLAGS,
+            startupinfo=SUBPROCESS_STARTUPINFO
+        )
+        if result.returncode == 0:
+            streams = []
+            # 每条音频流一行，格式为 "codec_name,channels"
+            for line in result.stdout.decode("ascii", errors="replace").splitlines():
+                if line.strip():
+                    codec_name, channels = line.strip().split(",")[:2]
+                    streams.append((codec_name, int(channels)))
+            return tuple(streams)
+    except (OSError, subprocess.SubprocessError, ValueError):
+        # ffprobe 不存在或输出无法解析
+        pass
+    return None
+
+
+def can_copy_audio(ffmpeg: str, in_file: Path) -> bool:
+    """所有音频流都已是立体声（或单声道）AAC 时可直接复制，无需重新编码。
+    
+    输出映射全部音频流（-map 0:a?），-c:a copy 对每条流生效，因此必须逐条检查：
+    任何一条为 LPCM 等 MP4 不支持直接封装的格式时都需要重新编码。
+    """
+    streams = probe_audio(ffmpeg, in_file)
+    return bool(streams) and all(codec_name == "aac" and channels <= 2 for codec_name, channels in streams)
+
+
+def probe_durations(ffmpeg: str, files: List[Path], max_workers: int = 16) -> Dict[Path, Optional[float]]:
+    """并行读取多个视频的时长（ffprobe 主要耗时在进程启动和读取文件头，适合多线程并行）。
+    
+    参数:
+        ffmpeg: ffmpeg 可执行文件路径
+        files: 输入视频文件列表
+        max_workers: 同时运行的 ffprobe 进程数上限
+        
+    返回:
+        文件路径 -> 时长（秒，无法读取时为 None）
+    """
+    if not files:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(files))) as executor:
+        return dict(zip(files, executor.map(partial(probe_duration, ffmpeg), files)))
+
+
+def format_cmd(cmd: List[str]) -> str:
+    """把命令格式化为可直接粘贴到当前平台 shell 中的字符串（Windows 使用 cmd.exe 的引号规则）。"""
+    if sys.platform == "win32":
+        return subprocess.list2cmdline(cmd)
+    return " ".join(shlex.quote(x) for x in cmd)
+
+
+def _set_process_suspended(p: subprocess.Popen, suspended: bool) -> bool:
+    """挂起或恢复子进程。成功返回 True；平台不支持或进程已退出时返回 False。"""
+    try:
+        if sys.platform == "win32":
+            if psutil is None:
+                return False
+            proc = psutil.Process(p.pid)
+            if suspended:
+                proc.suspend()
+            else:
+                proc.resume()
+        else:
+            os.kill(p.pid, signal.SIGSTOP if suspended else signal.SIGCONT)
+        return True
+    except Exception:
+        # 进程已退出或无权限
+        return False
+
+
+def _wait_while_paused(
+    p: subprocess.Popen,
+    is_paused: callable,
+    cancel_event: Optional[threading.Event],
+) -> None:
+    """暂停期间挂起 ffmpeg 进程，直到恢复或取消后再继续运行。"""
+    suspended = _set_process_suspended(p, True)
+    try:
+        while is_paused() and not (cancel_event and cancel_event.is_set()):
+            time.sleep(0.5)  # 等待 500 毫秒后再次检查
+    finally:
+        if suspended:
+            _set_process_suspended(p, False)
+
+
+@lru_cache(maxsize=4)
+def detect_hw_encoders(ffmpeg: str) -> frozenset:
+    """返回 ffmpeg 中编译了的硬件 HEVC 编码器（HW_HEVC_ENCODERS 的键）。结果在进程内缓存。
+    
+    只说明 ffmpeg 支持该编码器，不保证当前机器有对应的硬件；编码失败时由 process_file 回退到 x265。
+    """
+    try:
+        result = subprocess.run(
+            [ffmpeg, "-hide_banner", "-encoders"],
+            capture_output=True,
+            timeout=10,
+            creationflags=SUBPROCESS_CREATIONFLAGS,
+            startupinfo=SUBPROCESS_STARTUPINFO
+        )
+    except (OSError, subprocess.SubprocessError):
+        return frozenset()
+    # 每行格式为 " V....D hevc_nvenc  描述"，第二列为编码器名称
+    compiled = {line.split()[1] for line in result.stdout.splitlines() if len(line.split()) > 1}
+    return frozenset(
+        name for name, (hw_encoder, *_) in HW_HEVC_ENCODERS.items()
+        if hw_encoder.encode() in compiled
+    )
+
+
+def pick_encoder(ffmpeg: str, requested: str) -> str:
+    """解析 --encoder：'auto' 时按 AUTO_ENCODER_PRIORITY 选择第一个可用的硬件编码器，否则原样返回。"""
+    if requested != 'auto':
+        return requested
+    available = detect_hw_encoders(ffmpeg)
+    for name in AUTO_ENCODER_PRIORITY:
+        if name in available:
+            return name
+    return 'x265'
+
+
+def _terminate_on_cancel(p: subprocess.Popen, cancel_event: threading.Event) -> None:
+    """取消事件被设置后立即终止 ffmpeg，不等待下一个进度块；进程先行结束时直接返回。"""
+    while not cancel_event.wait(0.2):
+        if p.poll() is not None:
+            return
+    if p.poll() is None:
+        p.terminate()
+
+
+def run(
+    cmd: List[str],
+    dry_run: bool = False,
+    test_mode: bool = False,
+    is_paused: Optional[callable] = None,
+    progress_callback: Optional[callable] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> int:
     """执行命令并返回退出码。在执行前打印命令。
     
+    如果命令带有 ``-progress pipe:1``，会从 stdout 解析 ffmpeg 的 key=value 进度输出，
+    每个进度块结束时以已编码的时长（微秒）调用 progress_callback。
+    
     参数:
         cmd: 要执行的命令
         dry_run: 如果为 True，仅打印命令
         test_mode: 如果为 True，仅打印命令
-        is_paused: 如果进程应暂停则返回 True 的可调用对象
+        is_paused: 如果进程应暂停则返回 True 的可调用对象；暂停期间 ffmpeg 进程被挂起
+            （在每个进度块检查，Windows 下需要 psutil，否则只在开始前等待）
+        progress_callback: 接收已编码时长（out_time_us）的可调用对象
+        cancel_event: 设置后立即终止 ffmpeg 进程（由后台线程监视）
         
     返回:
         命令的退出码
     """
-    print("\n$ " + " ".join(shlex.quote(x) for x in cmd))
+    print("\n$ " + format_cmd(cmd))
     if dry_run or test_mode:
         return 0
     try:
-        # 启动进程（Windows 下隐藏窗口）
+        # 启动进程（Windows 下隐藏窗口），以二进制模式读取进度输出
         p = subprocess.Popen(
             cmd, 
             stdout=subprocess.PIPE, 
             stderr=subprocess.PIPE, 
-            text=True,
-            creationflags=CREATE_NO_WINDOW if sys.platform == "win32" else 0
+            bufsize=PIPE_BUFFER_SIZE,
+            creationflags=SUBPROCESS_CREATIONFLAGS,
+            startupinfo=SUBPROCESS_STARTUPINFO
         )
         
-        # 定期检查是否暂停
-        while is_paused and is_paused():
-            time.sleep(0.5)  # 等待 500 毫秒后再次检查
+        # 在后台线程中读取 stderr，避免管道写满导致 ffmpeg 阻塞
+        stderr_chunks = []
+        stderr_thread = threading.Thread(
+            target=lambda: stderr_chunks.append(p.stderr.read()),
+            daemon=True
+        )
+        stderr_thread.start()
+        
+        if cancel_event is not None:
+            threading.Thread(target=_terminate_on_cancel, args=(p, cancel_event), daemon=True).start()
+        
+        if is_paused and is_paused():
+            _wait_while_paused(p, is_paused, cancel_event)
+        
+        # 解析 -progress 输出（每行一个 key=value，以 progress=continue/end 结束一个块）
+        out_time_us = 0
+        for line in p.stdout:
+            key, _, value = line.strip().partition(b"=")
+            if key == b"out_time_us":
+                try:
+                    out_time_us = int(value)
+                except ValueError:
+                    # 开始编码前 ffmpeg 会输出 N/A
+                    pass
+            elif key == b"progress":
+                if cancel_event and cancel_event.is_set():
+                    break
+                if is_paused and is_paused():
+                    _wait_while_paused(p, is_paused, cancel_event)
+                if progress_callback:
+                    progress_callback(out_time_us)
+        
+        if cancel_event and cancel_event.is_set() and p.poll() is None:
+            # 取消：终止 ffmpeg，释放GPU编码会话和文件句柄
+            p.terminate()
         
         # 等待进程完成
-        stdout, stderr = p.communicate()
+        p.wait()
+        stderr_thread.join()
+        stderr = b"".join(stderr_chunks).decode("utf-8", errors="replace")
         
-        if p.returncode != 0:
+        if p.returncode != 0 and not (cancel_event and cancel_event.is_set()):
             print(f"Error output:\n{stderr}", file=sys.stderr)
         return p.returncode
     except FileNotFoundError:
@@ -220,43 +507,149 @@ def iter_video_files(input_path: Path, recursive: bool) -> Iterable[Path]:
             yield input_path
         return
 
-    pattern = "**/*" if recursive else "*"
-    for p in input_path.glob(pattern):
-        if p.is_file() and p.suffix.lower() in VIDEO_EXTS:
-            yield p
+    # 使用 os.scandir 遍历：目录项自带文件类型信息，无需对每个文件再 stat
+    pending = [os.fspath(input_path)]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        if os.path.splitext(entry.name)[1].lower() in VIDEO_EXTS:
+                            yield Path(entry.path)
+                    elif recursive and entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+        except OSError:
+            # 无权限或已被删除的子目录直接跳过
+            continue
+
+
+# 编码过程中的临时输出文件后缀（成功后改名为最终文件名；保留 .mp4 以便 ffmpeg 选择封装格式）
+PARTIAL_SUFFIX = ".partial.mp4"
+
+# 预览输出的高度（--preview），宽度按比例缩放
+PREVIEW_HEIGHT = 1080
+
+# HLG 色彩元数据（硬件编码器没有 -x265-params，通过通用输出参数写入）
+HLG_COLOR_ARGS = (
+    "-color_primaries", "bt2020",
+    "-color_trc", "arib-std-b67",  # HLG
+    "-colorspace", "bt2020nc",
+    "-color_range", "tv",          # Sony HLG 素材为有限范围
+)
+
+# 硬件 HEVC Main10 编码器（--encoder）：名称 -> (ffmpeg 编码器, 硬件解码方式, 质量参数, 像素格式, 附加参数)
+#   只指定 -hwaccel 而不指定 -hwaccel_output_format：硬件无法解码当前格式时
+#   （例如多数显卡不支持 10-bit 4:2:2），ffmpeg 会自动回退到软件解码
+#   硬件编码器不使用 x265 的预设名称，--preset 只对 x265 生效
+HW_HEVC_ENCODERS = {
+    'nvenc': ('hevc_nvenc', 'cuda', '-cq', 'p010le', ('-preset', 'p5', '-tune', 'hq', '-profile:v', 'main10', '-rc', 'vbr', '-b:v', '0')),
+    'qsv': ('hevc_qsv', 'auto', '-global_quality', 'p010le', ('-profile:v', 'main10')),
+    'videotoolbox': ('hevc_videotoolbox', 'videotoolbox', '-q:v', 'p010le', ('-profile:v', 'main10')),
+}
+
+ENCODER_CHOICES = ('x265',) + tuple(HW_HEVC_ENCODERS) + ('auto',)
+
+# --encoder auto 的硬件编码器优先级（ffmpeg 未编译的编码器跳过，都没有时使用 x265）
+AUTO_ENCODER_PRIORITY = ('videotoolbox', 'nvenc', 'qsv')
+
+# x265 的 HLG 元数据标签：
+#   colorprim=bt2020
+#   transfer=arib-std-b67  (HLG)
+#   colormatrix=bt2020nc
+# Main10 + level 5.1 适用于 4K60
+X265_HLG_PARAMS = (
+    "profile=main10:level=5.1:"
+    "colorprim=bt2020:transfer=arib-std-b67:colormatrix=bt2020nc"
+)
+
+# MP4 封装方式：
+#   faststart：编码结束后把 moov 移到文件开头（需要重写整个文件一次），适合离线播放
+#   streaming（--streaming）：分段 MP4，边编码边写入，结束时无需重写
+MOVFLAGS_FASTSTART = ("-movflags", "+faststart")
+MOVFLAGS_STREAMING = ("-movflags", "+frag_keyframe+empty_moov+default_base_moof", "-frag_duration", "2000000")
+
+# 每个输出文件共用的固定参数（导入时构建一次）
+_MAP_ARGS = ("-map", "0:v:0", "-map", "0:a?")
+_CONTAINER_ARGS = ("-tag:v", "hvc1")  # iPhone 兼容性 (MP4/MOV)
+_COPY_AUDIO_ARGS = ("-c:a", "copy")
 
 
 def build_ffmpeg_cmd(
     ffmpeg: str,
     in_file: Path,
-    out_file: Path,
+    out_file: Optional[Path],
     crf: int,
     preset: str,
     fps: Optional[float],
     audio_bitrate: str,
     overwrite: bool,
+    threads: Optional[int] = None,
+    preview_file: Optional[Path] = None,
+    encoder: str = 'x265',
+    max_bitrate: Optional[int] = None,
+    streaming: bool = False,
+    copy_audio: bool = False,
 ) -> List[str]:
-    """构建 ffmpeg 命令，用于将 Sony HLG 视频转码为手机兼容格式。"""
-    # HLG 元数据标签：
-    #   colorprim=bt2020
-    #   transfer=arib-std-b67  (HLG)
-    #   colormatrix=bt2020nc
-    # Main10 + level 5.1 适用于 4K60
-    x265_params = (
-        "profile=main10:level=5.1:" 
-        "colorprim=bt2020:transfer=arib-std-b67:colormatrix=bt2020nc"
-    )
-
+    """构建 ffmpeg 命令，用于将 Sony HLG 视频转码为手机兼容格式。
+    
+    threads 为该 ffmpeg 进程使用的线程数（None 表示由 ffmpeg/x265 自动决定，仅用于 x265）。
+    指定 preview_file 时在同一条命令中额外输出一个 1080p 预览版本，源文件只解码一次；
+    out_file 为 None 时只输出预览版本（用于主输出已存在、只需补齐预览的情况）。
+    encoder 为 'x265'（软件编码）或 HW_HEVC_ENCODERS 中的硬件编码器。
+    max_bitrate 为码率峰值上限（Mbps，None 表示不限制），在质量模式基础上限制输出大小。
+    streaming 为 True 时输出分段 MP4，省去 faststart 在编码结束后重写整个文件的过程。
+    copy_audio 为 True 时直接复制音频流（源音频已是 AAC 时使用），否则按 audio_bitrate 编码为 AAC。
+    """
     cmd = [
         ffmpeg,
         "-hide_banner",
         "-y" if overwrite else "-n",
-        "-i",
-        str(in_file),
-        "-map",
-        "0:v:0",
-        "-map",
-        "0:a?",
+        # 通过 stdout 输出机器可读的进度（key=value），stderr 只保留错误信息
+        "-progress",
+        "pipe:1",
+        "-nostats",
+        "-loglevel",
+        "error",
+    ]
+    hw = HW_HEVC_ENCODERS.get(encoder)
+    if hw is None:
+        video_args = _x265_video_args(crf, preset, threads)
+    else:
+        hw_encoder, hwaccel, quality_flag, pix_fmt, extra_args = hw
+        cmd += ["-hwaccel", hwaccel]
+        if quality_flag == "-q:v":
+            # VideoToolbox 的质量为 1-100（越大越好），由 CRF 线性换算
+            quality = max(1, round((51 - crf) * 100 / 51))
+        else:
+            quality = crf
+        video_args = ["-c:v", hw_encoder, *extra_args, quality_flag, str(quality), "-pix_fmt", pix_fmt, *HLG_COLOR_ARGS]
+    if max_bitrate:
+        # 限制码率峰值（VBV），缓冲区取两秒的最大码率
+        video_args += ["-maxrate", f"{max_bitrate}M", "-bufsize", f"{max_bitrate * 2}M"]
+    movflags = MOVFLAGS_STREAMING if streaming else MOVFLAGS_FASTSTART
+    audio_args = _COPY_AUDIO_ARGS if copy_audio else ("-c:a", "aac", "-b:a", audio_bitrate)
+    cmd += ["-i", str(in_file)]
+    if out_file is not None:
+        cmd += _output_args(out_file, video_args, fps, audio_args, movflags)
+    if preview_file is not None:
+        # 每个输出各自的 -map/-c:v 等参数依次排列，ffmpeg 共用同一次解码
+        cmd += _output_args(
+            preview_file, video_args, fps, audio_args, movflags,
+            video_filter=f"scale=-2:{PREVIEW_HEIGHT}",
+        )
+    return cmd
+
+
+def _x265_video_args(crf: int, preset: str, threads: Optional[int]) -> List[str]:
+    """返回 libx265 软件编码的视频参数。"""
+    x265_params = X265_HLG_PARAMS
+    args = []
+    if threads:
+        # x265 不使用 -threads，线程池大小需通过 pools 指定
+        x265_params += f":pools={threads}"
+        args += ["-threads", str(threads)]
+    args += [
         "-c:v",
         "libx265",
         "-preset",
@@ -267,19 +660,30 @@ def build_ffmpeg_cmd(
         "yuv420p10le",          # 10-bit 4:2:0，用于手机硬件解码
         "-x265-params",
         x265_params,
-        "-tag:v",
-        "hvc1",                 # iPhone 兼容性 (MP4/MOV)
-        "-c:a",
-        "aac",
-        "-b:a",
-        audio_bitrate,
-        "-movflags",
-        "+faststart",           # 更适合手机流媒体/预览
     ]
+    return args
+
+
+def _output_args(
+    out_file: Path,
+    video_args: List[str],
+    fps: Optional[float],
+    audio_args: Tuple[str, ...],
+    movflags: Tuple[str, ...] = MOVFLAGS_FASTSTART,
+    video_filter: Optional[str] = None,
+) -> List[str]:
+    """返回一个输出文件的 ffmpeg 参数（以输出文件路径结尾）。"""
+    args = list(_MAP_ARGS)
+    if video_filter:
+        args += ["-vf", video_filter]
+    args += video_args
+    args += _CONTAINER_ARGS
+    args += audio_args
+    args += movflags
     if fps is not None:
-        cmd += ["-r", str(fps)]
-    cmd += [str(out_file)]
-    return cmd
+        args += ["-r", str(fps)]
+    args += [str(out_file)]
+    return args
 
 
 def process_file(
@@ -294,34 +698,85 @@ def process_file(
     skip_existing: bool,
     dry_run: bool,
     progress: Optional[ProgressBar] = None,
-    test_mode: bool = False
+    test_mode: bool = False,
+    threads: Optional[int] = None,
+    preview: bool = False,
+    encoder: str = 'x265',
+    max_bitrate: Optional[int] = None,
+    streaming: bool = False
 ) -> Tuple[bool, str]:
-    """处理单个视频文件。返回 (成功, 消息)。"""
+    """处理单个视频文件。返回 (成功, 消息)。
+    
+    threads 为 ffmpeg 进程的线程数（可选）；preview 为 True 时同时输出 1080p 预览文件；
+    encoder 为视频编码器（见 ENCODER_CHOICES）；max_bitrate 为码率峰值上限（Mbps，可选）；
+    streaming 为 True 时输出分段 MP4。
+    """
     try:
         # 输出命名：保留原始名称，添加后缀
         out_name = f"{in_file.stem}_hlg_phone.mp4"
         out_file = output_dir / out_name
+        preview_file = output_dir / f"{in_file.stem}_hlg_phone_preview.mp4" if preview else None
 
-        if out_file.exists() and not overwrite:
-            if skip_existing:
+        outputs = (out_file,) if preview_file is None else (out_file, preview_file)
+        if not overwrite:
+            existed = [path for path in outputs if path.exists()]
+            if existed and not skip_existing:
+                # 与 ffmpeg -n 相同：不覆盖已存在的输出
+                return (False, f"FAILED (exists): {', '.join(path.name for path in existed)}")
+            # 跳过已存在的输出，只编码缺少的（例如主输出已存在时只补齐预览）
+            outputs = tuple(path for path in outputs if path not in existed)
+            if not outputs:
                 return (True, f"SKIP (exists): {out_file.name}")
         
-        cmd = build_ffmpeg_cmd(
+        # 先写入临时文件，编码成功后再改名为最终文件名：中断或失败的编码不会留下
+        # 被下次运行当作已完成而跳过的不完整文件（临时文件总是覆盖写入）
+        partial_files = tuple(path.with_name(path.stem + PARTIAL_SUFFIX) for path in outputs)
+        partial_for = dict(zip(outputs, partial_files))
+        
+        # 除编码器外的参数在回退到 x265 时保持不变
+        make_cmd = partial(
+            build_ffmpeg_cmd,
             ffmpeg=ffmpeg,
             in_file=in_file,
-            out_file=out_file,
+            out_file=partial_for.get(out_file),
             crf=crf,
             preset=preset,
             fps=fps,
             audio_bitrate=audio_bitrate,
-            overwrite=overwrite,
+            overwrite=True,
+            threads=threads,
+            preview_file=partial_for.get(preview_file),
+            max_bitrate=max_bitrate,
+            streaming=streaming,
+            # 源音频已是 AAC 时直接复制，省去重新编码（试运行和测试模式只打印命令，不启动 ffprobe）
+            copy_audio=not (dry_run or test_mode) and can_copy_audio(ffmpeg, in_file),
         )
 
-        rc = run(cmd, dry_run=dry_run, test_mode=test_mode)
-        if rc == 0:
+        progress_callback = None
+        if progress and not (dry_run or test_mode):
+            # 单线程模式下按已编码时长显示当前文件的进度
+            duration = probe_duration(ffmpeg, in_file)
+            if duration:
+                duration_us = duration * 1_000_000
+                progress_callback = lambda out_time_us: progress.set_partial(out_time_us / duration_us)
+
+        rc = run(make_cmd(encoder=encoder), dry_run=dry_run, test_mode=test_mode, progress_callback=progress_callback)
+        fell_back = False
+        if rc not in (0, 130) and encoder != 'x265':
+            # 硬件编码失败（例如 ffmpeg 支持但本机没有对应的GPU），回退到 x265 软件编码
+            print(f"{encoder} 编码失败 (exit code {rc})，回退到 x265: {in_file.name}")
+            _remove_files(partial_files)
+            rc = run(make_cmd(encoder='x265'), dry_run=dry_run, test_mode=test_mode, progress_callback=progress_callback)
+            fell_back = True
+        
+        if dry_run or test_mode:
             return (True, f"OK: {in_file.name}")
-        else:
+        if rc != 0:
+            _remove_files(partial_files)
             return (False, f"FAILED: {in_file.name} (exit code {rc})")
+        for partial_file, final_file in zip(partial_files, outputs):
+            os.replace(partial_file, final_file)
+        return (True, f"OK (x265回退): {in_file.name}" if fell_back else f"OK: {in_file.name}")
     except Exception as e:
         return (False, f"ERROR: {in_file.name} - {str(e)}")
     finally:
@@ -329,6 +784,28 @@ def process_file(
             progress.update()
 
 
+def _remove_files(paths: Iterable[Path]) -> None:
+    """删除文件，忽略不存在或无法删除的文件。"""
+    for path in paths:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _file_size(path: Path) -> int:
+    """返回文件大小（字节）；无法读取时返回 0。"""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def default_ffmpeg_threads(max_threads: int) -> int:
+    """按并行数量平分 CPU 核心，返回每个 ffmpeg 进程的线程数（至少为 1）。"""
+    return max(1, (os.cpu_count() or 1) // max(1, max_threads))
+
+
 def process_files_parallel(
     files: List[Path],
     output_dir: Path,
@@ -341,56 +818,65 @@ def process_files_parallel(
     skip_existing: bool,
     dry_run: bool,
     max_threads: int = 4,
-    test_mode: bool = False
+    test_mode: bool = False,
+    ffmpeg_threads: Optional[int] = None,
+    preview: bool = False,
+    encoder: str = 'x265',
+    max_bitrate: Optional[int] = None,
+    streaming: bool = False
 ) -> Tuple[int, int, int]:
-    """使用线程池并行处理文件。"""
+    """使用线程池并行处理文件。
+    
+    ffmpeg_threads 为每个 ffmpeg 进程的线程数；为 None 时按并行数量平分 CPU 核心，
+    避免 max_threads 个 ffmpeg 各自按全部核心创建线程导致 CPU 超额订阅。
+    """
     ok = 0
     fail = 0
     skipped = 0
     
-    # 使用线程安全的计数器
-    counters = threading.Lock()
-    
     def update_counters(result: Tuple[bool, str]):
         nonlocal ok, fail, skipped
         success, message = result
-        with counters:
-            print(message)
-            if "SKIP" in message:
-                skipped += 1
-            elif success:
-                ok += 1
-            else:
-                fail += 1
+        print(message)
+        if "SKIP" in message:
+            skipped += 1
+        elif success:
+            ok += 1
+        else:
+            fail += 1
+        progress.update()
     
-    # 创建线程池
-    threads = []
     progress = ProgressBar(len(files))
     
-    # 使用线程限制处理文件
-    for i, in_file in enumerate(files):
-        # 如果达到最大线程数，等待
-        if len(threads) >= max_threads:
-            # 等待任何线程完成
-            for thread in threads:
-                if not thread.is_alive():
-                    thread.join()
-                    threads.remove(thread)
-                    break
-        
-        # 启动新线程
-        thread = threading.Thread(
-                target=lambda f: update_counters(process_file(
-                    f, output_dir, ffmpeg, crf, preset, fps, audio_bitrate, overwrite, skip_existing, dry_run, progress, test_mode
-                )),
-                args=(in_file,)
-            )
-        thread.start()
-        threads.append(thread)
+    # 除输入文件外的参数对所有任务相同，预先绑定
+    task = partial(
+        process_file,
+        output_dir=output_dir,
+        ffmpeg=ffmpeg,
+        crf=crf,
+        preset=preset,
+        fps=fps,
+        audio_bitrate=audio_bitrate,
+        overwrite=overwrite,
+        skip_existing=skip_existing,
+        dry_run=dry_run,
+        test_mode=test_mode,
+        threads=ffmpeg_threads or default_ffmpeg_threads(max_threads),
+        preview=preview,
+        encoder=encoder,
+        max_bitrate=max_bitrate,
+        streaming=streaming,
+    )
     
-    # 等待所有线程完成
-    for thread in threads:
-        thread.join()
+    # 按文件大小从大到小调度（LPT），避免最大的文件最后才开始，导致批次末尾只有一个ffmpeg在运行
+    # （只需 stat，不启动 ffprobe；试运行时同样适用）
+    ordered = sorted(files, key=_file_size, reverse=True)
+    
+    # 线程池始终保持 max_threads 个任务在运行；结果在当前线程中按完成顺序汇总，无需加锁
+    with ThreadPoolExecutor(max_workers=max(1, max_threads)) as executor:
+        futures = [executor.submit(task, in_file) for in_file in ordered]
+        for future in as_completed(futures):
+            update_counters(future.result())
     
     return ok, fail, skipped
 
@@ -408,11 +894,16 @@ def main() -> int:
     parser.add_argument("--preset", default="medium", choices=SUPPORTED_PRESETS, help="x265 preset: ultrafast..placebo. Default: medium")
     parser.add_argument("--fps", type=float, default=60.0, help="Force output fps. Default: 60.0")
     parser.add_argument("--keep-fps", action="store_true", help="Do not force fps (keep source fps)")
-    parser.add_argument("--audio-bitrate", default="192k", help="AAC audio bitrate. Default: 192k")
+    parser.add_argument("--max-bitrate", type=int, default=None, help="Cap the peak video bitrate in Mbps on top of CRF (VBV, single pass). Default: no cap")
+    parser.add_argument("--audio-bitrate", default="192k", help="AAC audio bitrate, used when the source audio is not already stereo AAC (which is copied). Default: 192k")
     parser.add_argument("--overwrite", action="store_true", help="Overwrite existing outputs")
     parser.add_argument("--skip-existing", action="store_true", default=True, help="Skip if output exists (default behavior)")
     parser.add_argument("--dry-run", action="store_true", help="Print commands without running them")
     parser.add_argument("--threads", type=int, default=4, help="Number of parallel threads. Default: 4")
+    parser.add_argument("--ffmpeg-threads", type=int, default=None, help="Threads per ffmpeg process. Default: CPU cores / --threads (auto when --threads is 1)")
+    parser.add_argument("--encoder", default="x265", choices=ENCODER_CHOICES, help="Video encoder: x265 (software), a hardware HEVC Main10 encoder, or auto (first hardware encoder ffmpeg supports; falls back to x265). Default: x265")
+    parser.add_argument("--streaming", action="store_true", help="Write fragmented MP4 instead of +faststart (no post-encode rewrite of the whole file)")
+    parser.add_argument("--preview", action="store_true", help=f"Also write a {PREVIEW_HEIGHT}p preview (<name>_hlg_phone_preview.mp4) from the same decode")
     parser.add_argument("--test", action="store_true", help="Test mode: skip ffmpeg validation and show file processing logic")
     args = parser.parse_args()
 
@@ -421,6 +912,10 @@ def main() -> int:
         print(f"错误: CRF 必须在 0 到 51 之间（当前值: {args.crf}）。", file=sys.stderr)
         return 1
     
+    if args.max_bitrate is not None and args.max_bitrate <= 0:
+        print(f"错误: 最大码率必须大于 0（当前值: {args.max_bitrate}）。", file=sys.stderr)
+        return 1
+    
     # 验证输入路径是否存在
     input_path = Path(args.input).expanduser().resolve()
     if not input_path.exists():
@@ -447,6 +942,13 @@ def main() -> int:
 
     # 处理参数
     fps = None if args.keep_fps else args.fps
+    if args.encoder == 'auto' and (args.test or args.dry_run):
+        # 测试/预演模式不启动 ffmpeg 探测编码器
+        encoder = 'x265'
+    else:
+        encoder = pick_encoder(ffmpeg, args.encoder)
+    if args.encoder == 'auto':
+        print(f"自动选择编码器: {encoder}")
     
     # 收集要处理的文件
     files = list(iter_video_files(input_path, args.recursive))
@@ -461,7 +963,9 @@ def main() -> int:
         print("\n--- 试运行模式 ---")
         
     if args.threads > 1:
-        print(f"\n使用 {args.threads} 个并行线程处理...")
+        ffmpeg_threads = args.ffmpeg_threads or default_ffmpeg_threads(args.threads)
+        print(f"\n使用 {args.threads} 个并行线程处理（每个 ffmpeg {ffmpeg_threads} 线程，"
+              f"共 {args.threads * ffmpeg_threads} 线程，CPU 核心数 {os.cpu_count() or '未知'}）...")
         ok, fail, skipped = process_files_parallel(
             files=files,
             output_dir=output_dir,
@@ -474,7 +978,12 @@ def main() -> int:
             skip_existing=args.skip_existing,
             dry_run=args.dry_run,
             max_threads=args.threads,
-            test_mode=args.test
+            test_mode=args.test,
+            ffmpeg_threads=ffmpeg_threads,
+            preview=args.preview,
+            encoder=encoder,
+            max_bitrate=args.max_bitrate,
+            streaming=args.streaming
         )
     else:
         # 单线程模式，带进度条
@@ -497,7 +1006,12 @@ def main() -> int:
                 skip_existing=args.skip_existing,
                 dry_run=args.dry_run,
                 progress=progress,
-                test_mode=args.test
+                test_mode=args.test,
+                threads=args.ffmpeg_threads,
+                preview=args.preview,
+                encoder=encoder,
+                max_bitrate=args.max_bitrate,
+                streaming=args.streaming
             )
             print(message)
             if "SKIP" in message: